@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Latencia de consultas del índice espacial de aeropuertos contra el barrido completo.
+
+Uso:
+    python benchmarks/bench_airport_index.py [cantidad_de_aeropuertos]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from trackvuelos import airports  # noqa: E402
+from trackvuelos.airport_index import GridIndex  # noqa: E402
+
+QUERIES = 500
+
+
+def per_query_us(fn, points):
+    started = time.perf_counter()
+    for lat, lon, heading in points:
+        fn(lat, lon, heading)
+    return (time.perf_counter() - started) / len(points) * 1e6
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rng = np.random.default_rng(3)
+    # Distribución uniforme sobre la esfera, como un dataset mundial
+    lats = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+    lons = rng.uniform(-180, 180, n)
+    table = airports.AirportTable([f"X{i}" for i in range(n)], [""] * n, lats, lons)
+
+    started = time.perf_counter()
+    index = GridIndex.build(table)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    path = os.path.join(tempfile.mkdtemp(), "airport_index.npz")
+    index.save(path)
+    started = time.perf_counter()
+    loaded = GridIndex.load(path, table)
+    load_ms = (time.perf_counter() - started) * 1000
+    assert loaded is not None
+
+    points = [(float(np.degrees(np.arcsin(rng.uniform(-0.9, 0.9)))), float(rng.uniform(-180, 180)),
+               float(rng.uniform(0, 360))) for _ in range(QUERIES)]
+
+    print(f"Aeropuertos: {n}  build: {build_ms:.1f} ms  load desde disco: {load_ms:.1f} ms")
+    print(f"{'consulta':<22} {'barrido':>12} {'índice':>12}")
+    rows = [
+        ("más cercano",
+         lambda la, lo, h: airports.nearest_airports(table, la, lo),
+         lambda la, lo, h: index.nearest(la, lo, 1)),
+        ("5 más cercanos",
+         lambda la, lo, h: np.argsort(airports.distances_km(table, la, lo)[0])[:5],
+         lambda la, lo, h: index.nearest(la, lo, 5)),
+        ("radio 100 km",
+         lambda la, lo, h: np.nonzero(airports.distances_km(table, la, lo)[0] <= 100),
+         lambda la, lo, h: index.within_radius(la, lo, 100)),
+        ("cono ±45° / 3000 km",
+         lambda la, lo, h: airports.destination_airports(table, la, lo, h),
+         lambda la, lo, h: index.in_cone(la, lo, h, 45, 3000, 5)),
+    ]
+    for name, brute, indexed in rows:
+        print(f"{name:<22} {per_query_us(brute, points):>10.0f}us {per_query_us(indexed, points):>10.0f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Compara los loops escalares originales de aeropuerto más cercano/destino
+contra los kernels vectorizados de airports.py.
+
+Uso:
+    python benchmarks/bench_airports.py [cantidad_de_aviones]
+"""
+
+import os
+import sys
+import time
+from math import asin, atan2, cos, degrees, radians, sin, sqrt
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from trackvuelos import airports  # noqa: E402
+
+
+# Implementación anterior, como referencia
+def calculate_distance(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
+    return 6371 * 2 * asin(sqrt(a))
+
+
+def calculate_heading_to_airport(lat, lon, airport_lat, airport_lon):
+    lat1, lon1, lat2, lon2 = map(radians, [lat, lon, airport_lat, airport_lon])
+    dlon = lon2 - lon1
+    x = sin(dlon) * cos(lat2)
+    y = cos(lat1) * sin(lat2) - sin(lat1) * cos(lat2) * cos(dlon)
+    return (degrees(atan2(x, y)) + 360) % 360
+
+
+def loop_nearest(airport_dict, lat, lon):
+    nearest = None
+    min_distance = float("inf")
+    for code, airport in airport_dict.items():
+        distance = calculate_distance(lat, lon, airport["lat"], airport["lon"])
+        if distance < min_distance:
+            min_distance = distance
+            nearest = {"code": code, "name": airport["name"], "distance": round(distance, 1)}
+    return nearest
+
+
+def loop_destination(airport_dict, lat, lon, heading):
+    min_angle_diff = float("inf")
+    destination = None
+    for code, airport in airport_dict.items():
+        bearing = calculate_heading_to_airport(lat, lon, airport["lat"], airport["lon"])
+        angle_diff = abs(((bearing - heading + 180) % 360) - 180)
+        if angle_diff < 45 and angle_diff < min_angle_diff:
+            distance = calculate_distance(lat, lon, airport["lat"], airport["lon"])
+            if distance > 5:
+                min_angle_diff = angle_diff
+                destination = {"code": code, "name": airport["name"], "distance": round(distance, 1)}
+    return destination
+
+
+def random_airports(n, rng):
+    return {
+        f"X{i:05d}": {"name": f"Aeródromo {i}", "lat": float(rng.uniform(-56, -21)), "lon": float(rng.uniform(-74, -53))}
+        for i in range(n)
+    }
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def main():
+    aircraft = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    rng = np.random.default_rng(7)
+    lats = rng.uniform(-50, -25, aircraft)
+    lons = rng.uniform(-70, -55, aircraft)
+    headings = rng.uniform(0, 360, aircraft)
+
+    print(f"Aviones por tick: {aircraft}")
+    print(f"{'aeropuertos':>11} {'loop':>11} {'numpy':>11} {'speedup':>8}")
+    for n in (8, 1000, 50000):
+        airport_dict = random_airports(n, rng)
+        table = airports.AirportTable.from_dict(airport_dict)
+
+        loop_ms, expected = timed(lambda: [
+            (loop_nearest(airport_dict, la, lo), loop_destination(airport_dict, la, lo, h))
+            for la, lo, h in zip(lats, lons, headings)
+        ], repeat=1 if n > 1000 else 3)
+
+        def vectorized():
+            nearest_idx, nearest_dist = airports.nearest_airports(table, lats, lons)
+            dest_idx, dest_dist = airports.destination_airports(table, lats, lons, headings)
+            return [
+                (table.entry(ni, nd), table.entry(di, dd) if di >= 0 else None)
+                for ni, nd, di, dd in zip(nearest_idx, nearest_dist, dest_idx, dest_dist)
+            ]
+
+        numpy_ms, got = timed(vectorized)
+        assert [(a["code"], b and b["code"]) for a, b in got] == \
+            [(a["code"], b and b["code"]) for a, b in expected], "resultados distintos"
+        print(f"{n:>11} {loop_ms:>9.2f}ms {numpy_ms:>9.2f}ms {loop_ms / numpy_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
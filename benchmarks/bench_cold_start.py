@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Tiempo de arranque en frío de cada punto de entrada.
+
+Importa cada adaptador en un intérprete nuevo, varias veces, y reporta la
+mediana. También lista qué módulos pesados quedaron cargados, para verificar
+que el handler de Vercel no arrastra numpy, sqlite3 ni flask.
+
+Uso:
+    python benchmarks/bench_cold_start.py [repeticiones]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("numpy", "sqlite3", "flask", "dotenv")
+
+ENTRY_POINTS = {
+    "api/check.py": "sys.path.insert(0, %r); import importlib.util; "
+                    "spec = importlib.util.spec_from_file_location('check', %r); "
+                    "spec.loader.exec_module(importlib.util.module_from_spec(spec))"
+                    % (ROOT, os.path.join(ROOT, "api", "check.py")),
+    "trackvuelos": "sys.path.insert(0, %r); import trackvuelos" % ROOT,
+    "trackvuelos.tracker": "sys.path.insert(0, %r); from trackvuelos import tracker" % ROOT,
+    "monitor_vuelos": "sys.path.insert(0, %r); import monitor_vuelos" % ROOT,
+    "app": "sys.path.insert(0, %r); import app" % ROOT,
+}
+
+CHILD = """
+import sys, time
+started = time.perf_counter()
+%s
+elapsed = time.perf_counter() - started
+heavy = [m for m in %r if m in sys.modules]
+print(elapsed, ",".join(heavy))
+"""
+
+
+def measure(statement, workdir):
+    env = dict(os.environ, ENABLE_MONITOR="false",
+               HISTORY_DIR=os.path.join(workdir, "flight_history"),
+               FLIGHT_DB=os.path.join(workdir, "flights.db"),
+               STATE_FILE=os.path.join(workdir, "plane_state.json"))
+    out = subprocess.run([sys.executable, "-c", CHILD % (statement, HEAVY_MODULES)],
+                         capture_output=True, text=True, check=True, cwd=workdir, env=env)
+    elapsed, _, heavy = out.stdout.strip().splitlines()[-1].partition(" ")
+    return float(elapsed), heavy
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    workdir = tempfile.mkdtemp(prefix="bench_cold_start_")
+
+    print(f"{'punto de entrada':<22} {'mediana':>10} {'mínimo':>10}  módulos pesados")
+    for name, statement in ENTRY_POINTS.items():
+        samples = []
+        heavy = ""
+        for _ in range(repeat):
+            elapsed, heavy = measure(statement, workdir)
+            samples.append(elapsed)
+        print(f"{name:<22} {statistics.median(samples) * 1000:>8.1f}ms "
+              f"{min(samples) * 1000:>8.1f}ms  {heavy or '-'}")
+
+
+if __name__ == "__main__":
+    main()
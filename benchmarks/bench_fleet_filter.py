@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Costo por tick de filtrar el feed global de OpenSky con flotas de 5, 1k y 10k aviones.
+
+Compara el filtro en streaming con el set de la flota (lo que usa
+opensky.check_opensky), json.loads + set y, como referencia, json.loads +
+búsqueda lineal en una lista. También mide cargar el registro desde CSV y
+el camino rápido de FleetRegistry.current().
+
+Uso:
+    python benchmarks/bench_fleet_filter.py [filas_del_feed]
+"""
+
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from trackvuelos.fleet import Fleet, FleetRegistry  # noqa: E402
+from trackvuelos.opensky import OPENSKY_CHUNK_SIZE, iter_states  # noqa: E402
+
+FLEET_SIZES = (5, 1000, 10000)
+# Fracción de la flota que aparece en el feed
+AIRBORNE_RATIO = 0.1
+
+
+def make_fleet(n, rng):
+    hexes = set()
+    while len(hexes) < n:
+        hexes.add(f"{rng.randrange(16 ** 6):06x}")
+    return {icao24: f"LV-{i:05d}" for i, icao24 in enumerate(sorted(hexes))}
+
+
+def make_feed(rows, fleet, rng):
+    airborne = rng.sample(sorted(fleet), max(1, int(len(fleet) * AIRBORNE_RATIO)))
+    states = []
+    for i in range(rows):
+        icao24 = airborne[i] if i < len(airborne) else f"{rng.randrange(16 ** 6):06x}"
+        states.append([
+            icao24, f"TEST{i % 9999:04d}", "Argentina", 1700000000, 1700000000,
+            rng.uniform(-180, 180), rng.uniform(-90, 90), rng.uniform(0, 12000),
+            False, rng.uniform(0, 300), rng.uniform(0, 360), rng.uniform(-20, 20),
+            None, rng.uniform(0, 12000), "1234", False, 0,
+        ])
+    rng.shuffle(states)
+    return json.dumps({"time": 1700000000, "states": states}).encode()
+
+
+def best_of(fn, repeat=5):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def filter_stream(body, fleet):
+    chunks = (body[i:i + OPENSKY_CHUNK_SIZE] for i in range(0, len(body), OPENSKY_CHUNK_SIZE))
+    hexes = fleet.hexes
+    return [state for state in iter_states(chunks, fleet.wanted) if state[0].lower() in hexes]
+
+
+def filter_json_set(body, fleet):
+    hexes = fleet.hexes
+    return [state for state in json.loads(body)["states"] if state[0] in hexes]
+
+
+def filter_json_list(body, planes_list):
+    return [state for state in json.loads(body)["states"] if state[0] in planes_list]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 15000
+    rng = random.Random(42)
+    workdir = tempfile.mkdtemp(prefix="bench_fleet_")
+
+    print(f"Feed sintético de {rows} filas, {AIRBORNE_RATIO:.0%} de la flota en vuelo\n")
+    print(f"{'flota':>6} {'encontrados':>11} {'stream+set':>11} {'json+set':>10} "
+          f"{'json+lista':>11} {'carga CSV':>10} {'current()':>10}")
+
+    for n in FLEET_SIZES:
+        planes = make_fleet(n, rng)
+        body = make_feed(rows, planes, rng)
+        fleet = Fleet(planes)
+
+        stream_ms, found = best_of(lambda: filter_stream(body, fleet))
+        json_ms, found_json = best_of(lambda: filter_json_set(body, fleet))
+        assert len(found) == len(found_json)
+        planes_list = list(planes)
+        list_ms, _ = best_of(lambda: filter_json_list(body, planes_list), repeat=1)
+
+        path = os.path.join(workdir, f"fleet_{n}.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["icao24", "registration"])
+            writer.writerows(planes.items())
+        registry = FleetRegistry(path, check_interval=60)
+        load_ms, loaded = best_of(registry.reload)
+        assert len(loaded) == n
+
+        calls = 100000
+        started = time.perf_counter()
+        for _ in range(calls):
+            registry.current()
+        current_us = (time.perf_counter() - started) / calls * 1e6
+
+        print(f"{n:>6} {len(found):>11} {stream_ms:>9.1f}ms {json_ms:>8.1f}ms "
+              f"{list_ms:>9.1f}ms {load_ms:>8.1f}ms {current_us:>8.2f}µs")
+
+
+if __name__ == "__main__":
+    main()
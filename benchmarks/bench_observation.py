@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Memoria y tiempo de parseo de Observation contra el dict con "N/A".
+
+Parsea N state vectors de OpenSky con opensky.parse_state (Observation con
+__slots__, leída por índice) y, como referencia, con el parser de dicts que
+se usaba antes, y compara bytes por avión (tracemalloc, contando los valores
+nuevos), tiempo de parseo y tiempo de armar el JSON de la API.
+
+Uso:
+    python benchmarks/bench_observation.py [aviones]
+"""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from trackvuelos.opensky import parse_state  # noqa: E402
+
+
+def parse_state_dict(state):
+    """El parser anterior: un dict por avión con "N/A" donde falta el dato."""
+    vertical_ms = state[11] if state[11] is not None else None
+    baro_rate_fpm = round(vertical_ms * 196.85) if vertical_ms else "N/A"
+
+    return {
+        "icao24": state[0].lower(),
+        "callsign": state[1].strip() if state[1] else "",
+        "altitude": state[13] if state[13] is not None else "N/A",
+        "velocity": round(state[9] * 3.6, 1) if state[9] is not None else "N/A",
+        "country": state[2] if state[2] else "N/A",
+        "lat": state[6] if state[6] is not None else "N/A",
+        "lon": state[5] if state[5] is not None else "N/A",
+        "heading": state[10] if state[10] is not None else "N/A",
+        "baro_rate": baro_rate_fpm,
+        "squawk": "",
+        "source": "OpenSky"
+    }
+
+
+def make_states(n, rng):
+    states = []
+    for i in range(n):
+        states.append([
+            f"{rng.randrange(16 ** 6):06x}", f"TEST{i % 9999:04d}", "Argentina", 1700000000, 1700000000,
+            rng.uniform(-70, -50), rng.uniform(-55, -20), rng.uniform(0, 12000),
+            False, rng.uniform(0, 300), rng.uniform(0, 360), rng.uniform(-20, 20),
+            None, rng.uniform(0, 12000), "1234", False, 0,
+        ])
+    return states
+
+
+def best_of(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def allocated(fn):
+    tracemalloc.start()
+    result = fn()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    states = make_states(n, random.Random(42))
+
+    dict_bytes, dicts = allocated(lambda: [parse_state_dict(state) for state in states])
+    slots_bytes, observations = allocated(lambda: [parse_state(state) for state in states])
+    dict_parse = best_of(lambda: [parse_state_dict(state) for state in states])
+    slots_parse = best_of(lambda: [parse_state(state) for state in states])
+    dict_json = best_of(lambda: json.dumps(dicts))
+    slots_json = best_of(lambda: json.dumps([observation.to_dict() for observation in observations]))
+
+    print(f"{n} aviones")
+    print(f"{'':<14} {'bytes/avión':>12} {'parseo':>10} {'JSON API':>10}")
+    print(f"{'dict + N/A':<14} {dict_bytes / n:>12.0f} {dict_parse:>8.1f}ms {dict_json:>8.1f}ms")
+    print(f"{'Observation':<14} {slots_bytes / n:>12.0f} {slots_parse:>8.1f}ms {slots_json:>8.1f}ms")
+    print(f"Memoria: {dict_bytes / slots_bytes:.1f}x menos con Observation")
+
+
+if __name__ == "__main__":
+    main()
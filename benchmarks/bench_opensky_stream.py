@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Compara response.json() contra el parser en streaming de opensky.iter_states.
+
+Uso:
+    python benchmarks/bench_opensky_stream.py            # usa/crea el fixture
+    python benchmarks/bench_opensky_stream.py --record   # graba /states/all real
+
+Cada variante corre en un subproceso para que el pico de RSS sea comparable.
+"""
+
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Ambos modos cargan opensky (y requests) para que la base de RSS sea la misma
+from trackvuelos.opensky import OPENSKY_CHUNK_SIZE, OPENSKY_URL, iter_states  # noqa: E402
+
+FIXTURE = os.path.join(ROOT, "benchmarks", "fixtures", "states_all.json")
+WANTED = ["e0659a", "e030cf", "e06546", "e0b341", "e0b058"]
+
+
+def record_fixture(path):
+    import requests
+
+    response = requests.get(OPENSKY_URL, timeout=60)
+    response.raise_for_status()
+    with open(path, "wb") as f:
+        f.write(response.content)
+    print(f"📼 Grabado {len(response.content)} bytes en {path}")
+
+
+def synthesize_fixture(path, rows=15000):
+    """Genera un feed con el formato de /states/all cuando no hay uno grabado."""
+    rng = random.Random(42)
+    states = []
+    for i in range(rows):
+        icao24 = WANTED[i % len(WANTED)] if i % 3000 == 0 else f"{rng.randrange(16 ** 6):06x}"
+        states.append([
+            icao24, f"TEST{i % 9999:04d}", "Argentina", 1700000000, 1700000000,
+            rng.uniform(-180, 180), rng.uniform(-90, 90), rng.uniform(0, 12000),
+            False, rng.uniform(0, 300), rng.uniform(0, 360), rng.uniform(-20, 20),
+            None, rng.uniform(0, 12000), "1234", False, 0,
+        ])
+    with open(path, "w") as f:
+        json.dump({"time": 1700000000, "states": states}, f)
+    print(f"🧪 Fixture sintético: {rows} filas, {os.path.getsize(path)} bytes")
+
+
+def run_json(path):
+    with open(path, "rb") as f:
+        body = f.read()
+    data = json.loads(body)
+    wanted = set(WANTED)
+    return [state for state in data.get("states") or [] if state[0] in wanted]
+
+
+def run_stream(path):
+    def chunks():
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(OPENSKY_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+    return list(iter_states(chunks(), {icao24.encode() for icao24 in WANTED}))
+
+
+def child(mode, path):
+    started = time.perf_counter()
+    found = run_json(path) if mode == "json" else run_stream(path)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"mode": mode, "found": len(found), "ms": elapsed * 1000, "peak_kb": peak_kb}))
+
+
+def main():
+    if len(sys.argv) >= 3 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3])
+        return
+
+    os.makedirs(os.path.dirname(FIXTURE), exist_ok=True)
+    if "--record" in sys.argv:
+        record_fixture(FIXTURE)
+    elif not os.path.exists(FIXTURE):
+        synthesize_fixture(FIXTURE)
+
+    # Línea base: intérprete + imports, sin parsear nada
+    baseline = subprocess.run(
+        [sys.executable, "-c",
+         "import resource, sys; sys.path.insert(0, %r); from trackvuelos import opensky; "
+         "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)" % ROOT],
+        capture_output=True, text=True, check=True,
+    )
+    baseline_kb = int(baseline.stdout.strip())
+
+    print(f"Fixture: {FIXTURE} ({os.path.getsize(FIXTURE)} bytes)")
+    print(f"{'modo':<8} {'filas':>6} {'tiempo':>10} {'pico RSS':>10} {'sobre base':>11}")
+    for mode in ("json", "stream"):
+        samples = []
+        for _ in range(3):
+            out = subprocess.run([sys.executable, __file__, "--child", mode, FIXTURE],
+                                 capture_output=True, text=True, check=True)
+            samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        best = min(samples, key=lambda s: s["ms"])
+        print(f"{mode:<8} {best['found']:>6} {best['ms']:>8.1f}ms {best['peak_kb'] / 1024:>8.1f}MB "
+              f"{(best['peak_kb'] - baseline_kb) / 1024:>9.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Benchmark de punta a punta sin red: check_flights() contra el servidor de replay.
+
+Cada configuración (estrategia de consulta, latencia del servidor y filas
+de relleno en el feed) corre en un subproceso nuevo con el arnés de
+benchmarks/replay.py y reporta:
+
+- latencia por tick (p50, p95 y máximo, de la mejor de --repeat corridas),
+- pico de memoria asignada durante un tick (tracemalloc, en una segunda
+  corrida para no inflar los tiempos; incluye la respuesta que arma el
+  servidor, que corre en el mismo proceso) y RSS máximo del proceso,
+- consultas upstream y eventos notificados.
+
+Con el escenario sintético los eventos se comparan contra los esperados
+(despegues y aterrizajes en el tick correcto, sin despegues por carreteo ni
+falsos aterrizajes por huecos de cobertura). Con --baseline se compara contra una corrida guardada
+con --save-baseline y se falla si el p95 o la memoria empeoraron más que
+--tolerance. Termina con código 1 ante cualquier diferencia.
+
+Uso:
+    python benchmarks/bench_replay.py [--cassette DIR] [--save-baseline F | --baseline F]
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import replay  # noqa: E402
+from trackvuelos.metrics import percentile  # noqa: E402
+
+# (nombre, estrategia, latencia en segundos, filas de relleno)
+CONFIGS = (
+    ("icao24", "icao24", 0.0, 0),
+    ("icao24 +50ms", "icao24", 0.05, 0),
+    ("bbox 15k", "bbox", 0.0, 15000),
+    ("global 15k", "global", 0.0, 15000),
+    ("global 15k +50ms", "global", 0.05, 15000),
+)
+# Holgura absoluta para no fallar por ruido en valores chicos
+SLACK_MS = 5.0
+SLACK_KIB = 64.0
+
+
+def run_child(cassette, mode, latency, padding, trace):
+    """Corre el replay en este proceso; se llama en un subproceso por configuración."""
+    frames = replay.load_cassette(cassette) if cassette else replay.synthetic_frames()[0]
+    workdir = tempfile.mkdtemp(prefix="bench_replay_")
+    server = replay.StubServer(frames, latency, padding).start()
+    replay.configure(workdir, server, mode)
+    # Sin el límite de ADSB.one el tick mide el código y no el TokenBucket
+    os.environ.setdefault("ADSB_ONE_RATE", "1000")
+    os.environ.setdefault("ADSB_ONE_BURST", "1000")
+    # Con tracemalloc un tick puede pasar HEDGE_MIN_DELAY y el hedge abandonaría
+    # ADSB.one, corriendo eventos de tick (el hedge se prueba en chaos_upstreams)
+    os.environ.setdefault("HEDGE_MIN_DELAY", "10")
+
+    from trackvuelos import tracker
+
+    tracker.load()
+    ticks_ms = []
+    peaks_kib = []
+
+    def on_tick(tick, elapsed, planes_info):
+        ticks_ms.append(elapsed * 1000)
+        if trace:
+            peaks_kib.append(tracemalloc.get_traced_memory()[1] / 1024)
+            tracemalloc.reset_peak()
+
+    # Un tick de calentamiento (conexiones, imports perezosos) fuera de la medición
+    server.frame = 0
+    tracker.check_flights()
+    tracker.state.set_active(())
+    tracker.airborne.clear()
+    server.requests.update(opensky=0, adsb_one=0)
+
+    if trace:
+        tracemalloc.start()
+    events = replay.drive(tracker, server, frames, on_tick)
+    if trace:
+        tracemalloc.stop()
+    server.stop()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "ticks": len(ticks_ms),
+        "ticks_ms": ticks_ms,
+        "peak_kib": max(peaks_kib) if peaks_kib else None,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "requests": dict(server.requests),
+        "events": events,
+    }
+
+
+def run_config(cassette, mode, latency, padding, trace):
+    spec = json.dumps({"cassette": cassette, "mode": mode, "latency": latency,
+                       "padding": padding, "trace": trace})
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", spec],
+                         capture_output=True, text=True, check=True).stdout
+    # El tracker imprime su log; el resultado es la última línea
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def compare(name, result, base, tolerance):
+    problems = []
+    if base is None:
+        return problems
+    if result["events"] != base["events"]:
+        problems.append(f"{name}: eventos distintos a la línea base")
+    limit = base["p95_ms"] * (1 + tolerance) + SLACK_MS
+    if result["p95_ms"] > limit:
+        problems.append(f"{name}: p95 {result['p95_ms']:.1f} ms > {limit:.1f} ms")
+    if base.get("peak_kib") is not None and result.get("peak_kib") is not None:
+        limit = base["peak_kib"] * (1 + tolerance) + SLACK_KIB
+        if result["peak_kib"] > limit:
+            problems.append(f"{name}: pico de memoria {result['peak_kib']:.0f} KiB > {limit:.0f} KiB")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--cassette", help="directorio grabado con replay.py (default: escenario sintético)")
+    parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--save-baseline", help="guardar los resultados en este JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="empeoramiento relativo admitido")
+    parser.add_argument("--repeat", type=int, default=3, help="corridas por configuración para medir tiempos")
+    args = parser.parse_args()
+
+    if args.child:
+        spec = json.loads(args.child)
+        result = run_child(spec["cassette"], spec["mode"], spec["latency"], spec["padding"], spec["trace"])
+        print(json.dumps(result))
+        return
+
+    cassette = os.path.abspath(args.cassette) if args.cassette else None
+    expected = None if cassette else [list(event) for event in replay.synthetic_frames()[1]]
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(f"Replay de {'cassette ' + cassette if cassette else 'escenario sintético'}\n")
+    print(f"{'configuración':<18} {'ticks':>5} {'p50':>8} {'p95':>8} {'máx':>8} "
+          f"{'pico tick':>10} {'RSS':>7} {'OpenSky':>7} {'ADSB.one':>8} {'eventos':>8}")
+
+    results = {}
+    problems = []
+    started = time.perf_counter()
+    for name, mode, latency, padding in CONFIGS:
+        runs = [run_config(cassette, mode, latency, padding, trace=False) for _ in range(max(1, args.repeat))]
+        timed = min(runs, key=lambda run: percentile(run["ticks_ms"], 0.95))
+        traced = run_config(cassette, mode, latency, padding, trace=True)
+        ticks_ms = timed["ticks_ms"]
+        result = {
+            "p50_ms": statistics.median(ticks_ms),
+            "p95_ms": percentile(ticks_ms, 0.95),
+            "max_ms": max(ticks_ms),
+            "peak_kib": traced["peak_kib"],
+            "rss_mb": timed["rss_mb"],
+            "requests": timed["requests"],
+            "events": timed["events"],
+        }
+        results[name] = result
+
+        ok = expected is None or result["events"] == expected
+        if not ok:
+            problems.append(f"{name}: eventos {result['events']} != esperados {expected}")
+        if any(run["events"] != timed["events"] for run in runs + [traced]):
+            problems.append(f"{name}: las corridas notificaron eventos distintos")
+        problems.extend(compare(name, result, (baseline or {}).get(name), args.tolerance))
+
+        print(f"{name:<18} {timed['ticks']:>5} {result['p50_ms']:>6.1f}ms {result['p95_ms']:>6.1f}ms "
+              f"{result['max_ms']:>6.1f}ms {result['peak_kib']:>7.0f}KiB {result['rss_mb']:>5.0f}MB "
+              f"{result['requests']['opensky']:>7} {result['requests']['adsb_one']:>8} "
+              f"{len(result['events']):>6} {'✅' if ok else '❌'}")
+
+    print(f"\nTotal {time.perf_counter() - started:.1f} s")
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Línea base guardada en {args.save_baseline}")
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        sys.exit(1)
+    print("✅ OK")
+
+
+if __name__ == "__main__":
+    main()
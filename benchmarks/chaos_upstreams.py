@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Circuit breakers y hedge contra el servidor de replay con fallas inyectadas.
+
+Cada escenario corre el escenario sintético de benchmarks/replay.py en un
+subproceso, con StubServer.set_fault() simulando una fuente lenta, caída o
+que se recupera, y reporta latencia por tick, consultas a cada fuente,
+consultas abandonadas por el hedge y el estado de cada circuito. Los
+tiempos del breaker y del hedge se achican para que todo entre en unos
+segundos.
+
+Comprueba que:
+- con una consulta lenta de OpenSky, el hedge sigue con ADSB.one sin
+  esperarla (y sin hedge el tick se demora),
+- con OpenSky caído o lento siempre, su circuito se abre y deja de recibir
+  una consulta por tick, sin perder despegues ni aterrizajes,
+- al volver OpenSky, el circuito se cierra.
+
+Termina con código 1 si algo no se cumple.
+
+Uso:
+    python benchmarks/chaos_upstreams.py
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import replay  # noqa: E402
+from trackvuelos.metrics import percentile  # noqa: E402
+
+ENV = {
+    "BREAKER_OPEN_SECONDS": "0.5",
+    "BREAKER_SLOW_SECONDS": "0.4",
+    "HEDGE_MIN_DELAY": "0.05",
+    "OPENSKY_TIMEOUT": "5",
+    "ADSB_ONE_TIMEOUT": "5",
+    "ADSB_ONE_RATE": "1000",
+    "ADSB_ONE_BURST": "1000",
+    "LOG_LEVEL": "ERROR",
+}
+# Pausa entre ticks, para que pasen los tiempos del breaker
+TICK_PAUSE = 0.2
+SLOW_S = 1.5
+SLOW_ONCE = {8: {"opensky": {"latency": SLOW_S}}, 9: {"opensky": {}}}
+
+# nombre: ({tick: fallas a partir de ese tick}, variables extra)
+SCENARIOS = {
+    "sin fallas": ({}, {}),
+    "OpenSky lento 1 tick": (SLOW_ONCE, {}),
+    "ídem sin hedge": (SLOW_ONCE, {"HEDGE_MIN_SAMPLES": "1000000"}),
+    "OpenSky caído": ({0: {"opensky": {"error_rate": 1.0}}}, {}),
+    "OpenSky lento siempre": ({0: {"opensky": {"latency": 0.6}}}, {}),
+    "OpenSky vuelve": ({0: {"opensky": {"error_rate": 1.0}}, 10: {"opensky": {}}}, {}),
+}
+# Sin respuestas de OpenSky por varios ticks no se puede seguir a los aviones que
+# solo ve OpenSky: su aterrizaje espera a que vuelva. En "lento 1 tick" la consulta
+# abandonada sigue en curso y las siguientes se saltean mientras tanto
+OPENSKY_DOWN = {"OpenSky lento 1 tick", "OpenSky caído", "OpenSky lento siempre", "OpenSky vuelve"}
+
+
+def comparable(name, events):
+    if name not in OPENSKY_DOWN:
+        return events
+    return [event for event in events if event[2] != replay.SCENARIO_GROUND_ONCE[1]]
+
+
+def run_child(name):
+    changes = SCENARIOS[name][0]
+    frames = replay.synthetic_frames()[0]
+    workdir = tempfile.mkdtemp(prefix="chaos_")
+    server = replay.StubServer(frames).start()
+    replay.configure(workdir, server)
+
+    from trackvuelos import fusion, tracker
+
+    tracker.load()
+    # Historia de latencias sin fallas para que el hedge tenga un p95
+    server.frame = 0
+    for _ in range(6):
+        tracker.check_flights()
+    tracker.state.set_active(())
+    tracker.airborne.clear()
+    server.requests.update(opensky=0, adsb_one=0)
+
+    def apply(tick):
+        for source, fault in changes.get(tick, {}).items():
+            server.set_fault(source, **fault)
+
+    apply(0)
+    ticks_ms = []
+    opened = set()
+
+    def on_tick(tick, elapsed, planes_info):
+        ticks_ms.append(elapsed * 1000)
+        for source, breaker in tracker.fusion_engine.breakers.items():
+            if breaker.state != "closed":
+                opened.add(source)
+        apply(tick + 1)
+        time.sleep(TICK_PAUSE)
+
+    events = replay.drive(tracker, server, frames, on_tick)
+    # Lo que quedó abandonado por el hedge termina antes de leer los contadores
+    time.sleep(SLOW_S)
+    server.stop()
+    shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "ticks_ms": ticks_ms,
+        "requests": dict(server.requests),
+        "hedged": {key[0]: value for key, value in fusion.hedged_requests._values.items()},
+        "opened": sorted(opened),
+        "breakers": {source: breaker.state for source, breaker in tracker.fusion_engine.breakers.items()},
+        "events": events,
+    }
+
+
+def run_scenario(name):
+    env = dict(os.environ, **ENV, **SCENARIOS[name][1])
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name],
+                         capture_output=True, text=True, check=True, env=env).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child)))
+        return
+
+    frames, expected = replay.synthetic_frames()
+    expected = [list(event) for event in expected]
+    print(f"{'escenario':<22} {'p50':>8} {'p95':>8} {'máx':>8} {'OpenSky':>7} {'ADSB.one':>8} "
+          f"{'hedge':>5} {'abiertos':>9} {'al final':>16} eventos")
+
+    results = {}
+    for name in SCENARIOS:
+        result = results[name] = run_scenario(name)
+        ticks_ms = result["ticks_ms"]
+        ok = comparable(name, result["events"]) == comparable(name, expected)
+        final = ",".join(f"{source[:3]}={state}" for source, state in sorted(result["breakers"].items()))
+        print(f"{name:<22} {statistics.median(ticks_ms):>6.0f}ms {percentile(ticks_ms, 0.95):>6.0f}ms "
+              f"{max(ticks_ms):>6.0f}ms {result['requests']['opensky']:>7} {result['requests']['adsb_one']:>8} "
+              f"{sum(result['hedged'].values()):>5} {','.join(result['opened']) or '-':>9} {final:>16} "
+              f"{'✅' if ok else '❌'}")
+
+    problems = []
+    for name, result in results.items():
+        if comparable(name, result["events"]) != comparable(name, expected):
+            problems.append(f"{name}: eventos {comparable(name, result['events'])} "
+                            f"!= esperados {comparable(name, expected)}")
+
+    ticks = len(frames)
+    slow_ms = SLOW_S * 1000
+    if max(results["OpenSky lento 1 tick"]["ticks_ms"]) >= slow_ms / 2:
+        problems.append("OpenSky lento 1 tick: el hedge no evitó la demora")
+    if max(results["ídem sin hedge"]["ticks_ms"]) < slow_ms:
+        problems.append("ídem sin hedge: la demora inyectada no llegó al tick (el escenario no prueba nada)")
+    if results["OpenSky lento 1 tick"]["opened"]:
+        problems.append("OpenSky lento 1 tick: una sola consulta lenta abrió el circuito")
+    for name in ("OpenSky caído", "OpenSky lento siempre"):
+        if "opensky" not in results[name]["opened"]:
+            problems.append(f"{name}: el circuito de OpenSky no se abrió")
+        if results[name]["requests"]["opensky"] >= ticks:
+            problems.append(f"{name}: OpenSky siguió recibiendo una consulta por tick")
+    if results["OpenSky vuelve"]["breakers"].get("opensky") != "closed":
+        problems.append("OpenSky vuelve: el circuito no se cerró")
+    if "opensky" in results["sin fallas"]["opened"]:
+        problems.append("sin fallas: se abrió un circuito")
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        sys.exit(1)
+    print("✅ OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Inyección de fallas sobre la persistencia de PlaneState.
+
+Dos pruebas:
+
+1. Fallas simuladas: se hace fallar os.write, os.fsync u os.replace en cada
+   punto posible de atomic_write y se verifica que el archivo siga siendo el
+   anterior completo, que no queden temporales y que el estado siga sucio
+   para reintentarse en el próximo tick.
+2. Cortes reales: un proceso hijo guarda estados sin parar y se lo mata con
+   SIGKILL en un momento al azar; después el archivo tiene que cargar como
+   JSON válido e igual a alguno de los estados que el hijo llegó a escribir.
+
+Termina con código 1 si alguna verificación falla.
+
+Uso:
+    python benchmarks/crash_plane_state.py [cortes]
+"""
+import json
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from trackvuelos.plane_state import PlaneState  # noqa: E402
+
+# El hijo escribe el estado i con i aviones notificados N0..Ni-1 y activo Ai
+CHILD = """
+import sys
+sys.path.insert(0, %r)
+from trackvuelos.plane_state import PlaneState
+state = PlaneState(%r)
+state.load()
+i = len(state.notified)
+print("listo", flush=True)
+while True:
+    state.mark_notified(f"N{i}")
+    state.set_active([f"A{i}"])
+    state.save()
+    i += 1
+"""
+
+
+class InjectedFault(OSError):
+    pass
+
+
+def expected(i):
+    return {"notified_planes": sorted(f"N{k}" for k in range(i)), "active_planes": [f"A{i - 1}"] if i else []}
+
+
+def debris(directory):
+    return [name for name in os.listdir(directory) if ".tmp-" in name or ".corrupt-" in name]
+
+
+def inject(name, at):
+    """Reemplaza os.<name> para que falle en la llamada número `at`."""
+    original = getattr(os, name)
+    calls = [0]
+
+    def faulty(*args):
+        calls[0] += 1
+        if calls[0] == at:
+            raise InjectedFault(f"falla inyectada en os.{name}")
+        return original(*args)
+
+    setattr(os, name, faulty)
+    return lambda: setattr(os, name, original)
+
+
+def simulated_faults(workdir):
+    failures = 0
+    path = os.path.join(workdir, "state.json")
+    cases = [(name, at) for name in ("write", "fsync", "replace") for at in (1, 2)]
+    for name, at in cases:
+        for f in os.listdir(workdir):
+            os.remove(os.path.join(workdir, f))
+        state = PlaneState(path)
+        state.mark_notified("LV-OLD")
+        state.save()
+        with open(path, "rb") as f:
+            before = f.read()
+
+        state.mark_notified("LV-NEW")
+        restore = inject(name, at)
+        try:
+            wrote = state.save()
+        finally:
+            restore()
+
+        with open(path, "rb") as f:
+            after = f.read()
+        fired = not wrote
+        ok = (after == before if fired else json.loads(after)["notified_planes"] == ["LV-NEW", "LV-OLD"])
+        ok = ok and not debris(workdir) and state.dirty == fired
+        # El próximo tick tiene que poder escribir
+        state.save()
+        reloaded = PlaneState(path)
+        reloaded.load()
+        ok = ok and reloaded.notified == {"LV-OLD", "LV-NEW"} and not state.dirty
+
+        label = "falló" if fired else "no llegó"
+        print(f"  os.{name:<8} llamada {at}: {label:<8} {'OK' if ok else 'FALLA'}")
+        failures += not ok
+    return failures
+
+
+def real_crashes(workdir, rounds, rng):
+    failures = 0
+    path = os.path.join(workdir, "state.json")
+    for f in os.listdir(workdir):
+        os.remove(os.path.join(workdir, f))
+
+    last = 0
+    for _ in range(rounds):
+        child = subprocess.Popen([sys.executable, "-c", CHILD % (ROOT, path)],
+                                 stdout=subprocess.PIPE, text=True)
+        child.stdout.readline()
+        time.sleep(rng.uniform(0.001, 0.05))
+        child.send_signal(signal.SIGKILL)
+        child.wait()
+        child.stdout.close()
+
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"  archivo ilegible tras el corte: {e}")
+            failures += 1
+            break
+        i = len(data["notified_planes"])
+        if data != expected(i) or i < last:
+            print(f"  estado inesperado tras el corte ({i} notificados, antes {last})")
+            failures += 1
+        last = i
+        # Un temporal huérfano del hijo muerto es esperable; el próximo save lo pisa
+        for name in debris(workdir):
+            if ".corrupt-" in name:
+                print(f"  PlaneState.load() apartó el archivo: {name}")
+                failures += 1
+            os.remove(os.path.join(workdir, name))
+
+    print(f"  {rounds} cortes con SIGKILL, {last} estados escritos, {failures} fallas")
+    return failures
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rng = random.Random(42)
+    workdir = tempfile.mkdtemp(prefix="crash_state_")
+    try:
+        print("Fallas simuladas en atomic_write:")
+        failures = simulated_faults(workdir)
+        print("Cortes reales del proceso:")
+        failures += real_crashes(workdir, rounds, rng)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("✅ OK" if not failures else f"❌ {failures} fallas")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""Prueba de carga de /api/stream bajo gunicorn con workers gevent.
+
+Levanta el servidor de replay de benchmarks/replay.py (escenario sintético
+en loop, un frame cada --frame-interval segundos) y gunicorn con el monitor
+encendido e intervalos cortos. Mide primero las consultas upstream sin
+navegadores y después con N clientes SSE abiertos a la vez (sockets crudos
+con selectors, sin dependencias) y reporta:
+
+- tiempo hasta el primer snapshot de cada cliente,
+- deltas, heartbeats y saltos de secuencia por cliente,
+- demora de entrega de cada delta (desde el `timestamp` del evento),
+- consultas upstream por segundo con y sin clientes y clientes que ve /status.
+
+Falla si algún cliente no recibió snapshot o deltas, si hubo saltos sin
+resync, o si las consultas upstream crecen con los clientes.
+
+Uso:
+    python benchmarks/load_sse.py [--clients 500] [--duration 10]
+"""
+import argparse
+import json
+import os
+import resource
+import selectors
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import replay  # noqa: E402
+from trackvuelos.metrics import percentile  # noqa: E402
+
+# Consultas upstream por segundo con clientes / sin clientes que se toleran
+MAX_UPSTREAM_RATIO = 1.5
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/status", timeout=1) as response:
+                return json.load(response)
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn no respondió a tiempo")
+
+
+def advance_frames(server, frames, interval, stop):
+    while not stop.wait(interval):
+        server.frame = (server.frame + 1) % len(frames)
+
+
+class Client:
+    """Una conexión SSE; parsea los eventos a medida que llegan."""
+
+    def __init__(self, port):
+        self.sock = socket.create_connection(("127.0.0.1", port))
+        self.started = time.monotonic()
+        # HTTP/1.0: sin chunked, el cuerpo son los eventos tal cual
+        self.sock.sendall(b"GET /api/stream HTTP/1.0\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n")
+        self.sock.setblocking(False)
+        self.buffer = b""
+        self.headers_done = False
+        self.first_snapshot = None
+        self.seq = None
+        self.snapshots = 0
+        self.deltas = 0
+        self.heartbeats = 0
+        self.gaps = 0
+        self.lags = []
+        self.closed = False
+
+    def feed(self, data):
+        self.buffer += data
+        if not self.headers_done:
+            head, sep, rest = self.buffer.partition(b"\r\n\r\n")
+            if not sep:
+                return
+            if b" 200 " not in head.split(b"\r\n", 1)[0]:
+                raise RuntimeError(head.split(b"\r\n", 1)[0].decode())
+            self.headers_done = True
+            self.buffer = rest
+        *events, self.buffer = self.buffer.split(b"\n\n")
+        for raw in events:
+            self.handle(raw.decode())
+
+    def handle(self, raw):
+        if raw.startswith(":"):
+            self.heartbeats += 1
+            return
+        fields = {}
+        data = []
+        for line in raw.split("\n"):
+            name, _, value = line.partition(": ")
+            if name == "data":
+                data.append(value)
+            else:
+                fields[name] = value
+        if "event" not in fields:
+            return
+        payload = json.loads("\n".join(data))
+        if fields["event"] == "snapshot":
+            self.snapshots += 1
+            if self.first_snapshot is None:
+                self.first_snapshot = time.monotonic() - self.started
+        elif fields["event"] == "delta":
+            self.deltas += 1
+            if self.seq is not None and payload["seq"] != self.seq + 1:
+                self.gaps += 1
+            self.lags.append((datetime.now() - datetime.fromisoformat(payload["timestamp"])).total_seconds())
+        self.seq = payload["seq"]
+
+
+def run_clients(base_url, port, count, duration):
+    selector = selectors.DefaultSelector()
+    clients = []
+    for _ in range(count):
+        client = Client(port)
+        selector.register(client.sock, selectors.EVENT_READ, client)
+        clients.append(client)
+
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        for key, _ in selector.select(timeout=0.5):
+            client = key.data
+            try:
+                data = client.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                continue
+            except OSError:
+                data = b""
+            if not data:
+                client.closed = True
+                selector.unregister(client.sock)
+                continue
+            client.feed(data)
+
+    status = wait_ready(base_url)
+    for client in clients:
+        client.sock.close()
+    selector.close()
+    return clients, status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=10, help="segundos de cada fase")
+    parser.add_argument("--frame-interval", type=float, default=0.5, help="segundos entre frames del replay")
+    args = parser.parse_args()
+
+    # Cada cliente es un socket acá y otro en gunicorn
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (max(soft, min(hard, args.clients * 2 + 256)), hard))
+
+    frames = replay.synthetic_frames()[0]
+    workdir = tempfile.mkdtemp(prefix="load_sse_")
+    server = replay.StubServer(frames).start()
+    replay.configure(workdir, server)
+    interval = str(args.frame_interval / 2)
+    os.environ.update({
+        "ENABLE_MONITOR": "true",
+        "POLL_TERMINAL_INTERVAL": interval,
+        "POLL_ACTIVE_INTERVAL": interval,
+        "POLL_IDLE_INTERVAL": interval,
+        "POLL_IDLE_MAX_INTERVAL": interval,
+        "POLL_BATCH_WINDOW": "0",
+        "ADSB_ONE_RATE": "1000",
+        "ADSB_ONE_BURST": "1000",
+        "SSE_HEARTBEAT": "2",
+        "LOG_LEVEL": "WARNING",
+    })
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    gunicorn = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app", "-k", "gevent",
+         "--worker-connections", str(args.clients + 100), "--workers", "1",
+         "--bind", f"127.0.0.1:{port}", "--log-level", "warning"],
+        cwd=ROOT,
+    )
+    stop = threading.Event()
+    problems = []
+    try:
+        wait_ready(base_url)
+        threading.Thread(target=advance_frames, args=(server, frames, args.frame_interval, stop),
+                         daemon=True).start()
+
+        print(f"Fase 1: sin clientes, {args.duration:.0f} s")
+        before = sum(server.requests.values())
+        time.sleep(args.duration)
+        idle_rate = (sum(server.requests.values()) - before) / args.duration
+
+        print(f"Fase 2: {args.clients} clientes SSE, {args.duration:.0f} s")
+        before = sum(server.requests.values())
+        clients, status = run_clients(base_url, port, args.clients, args.duration)
+        loaded_rate = (sum(server.requests.values()) - before) / args.duration
+    finally:
+        stop.set()
+        gunicorn.terminate()
+        gunicorn.wait(timeout=30)
+        server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    first = [client.first_snapshot for client in clients if client.first_snapshot is not None]
+    deltas = [client.deltas for client in clients]
+    lags_ms = [lag * 1000 for client in clients for lag in client.lags]
+    heartbeats = sum(client.heartbeats for client in clients)
+    gaps = sum(client.gaps for client in clients)
+
+    print(f"\nClientes con snapshot:      {len(first)}/{len(clients)}")
+    if first:
+        print(f"Primer snapshot:            p50 {statistics.median(first) * 1000:.1f} ms, "
+              f"p95 {percentile(first, 0.95) * 1000:.1f} ms, máx {max(first) * 1000:.1f} ms")
+    print(f"Deltas por cliente:         mín {min(deltas)}, máx {max(deltas)}")
+    if lags_ms:
+        print(f"Demora de entrega:          p50 {statistics.median(lags_ms):.1f} ms, "
+              f"p95 {percentile(lags_ms, 0.95):.1f} ms, máx {max(lags_ms):.1f} ms")
+    print(f"Heartbeats recibidos:       {heartbeats}")
+    print(f"Saltos de secuencia:        {gaps}")
+    print(f"Conexiones cortadas:        {sum(client.closed for client in clients)}")
+    print(f"Clientes según /status:     {status.get('stream_clients')}")
+    print(f"Consultas upstream/s:       {idle_rate:.2f} sin clientes, {loaded_rate:.2f} con {args.clients}")
+
+    if len(first) < len(clients):
+        problems.append(f"{len(clients) - len(first)} clientes sin snapshot")
+    if min(deltas) == 0:
+        problems.append("hay clientes que no recibieron deltas")
+    if gaps:
+        problems.append(f"{gaps} saltos de secuencia sin resync")
+    if status.get("stream_clients") != len(clients):
+        problems.append("/status no cuenta a todos los clientes")
+    if any(client.closed for client in clients):
+        problems.append("el servidor cortó conexiones")
+    if idle_rate and loaded_rate > idle_rate * MAX_UPSTREAM_RATIO:
+        problems.append("las consultas upstream crecen con los clientes")
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        sys.exit(1)
+    print("✅ OK")
+
+
+if __name__ == "__main__":
+    main()
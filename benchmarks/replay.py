@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""Arnés de replay: graba respuestas de OpenSky y ADSB.one y las sirve localmente.
+
+Un cassette es un directorio con un archivo por tick (`0000.json`, ...):
+
+    {"ts": 1700000000, "opensky": <cuerpo de /states/all>,
+     "adsb_one": {"e0659a": <cuerpo de /v2/hex/e0659a>, ...}}
+
+StubServer sirve el frame actual en `/api/states/all` (respetando los
+filtros icao24 y de caja) y en `/v2/hex/<hex>`, con latencia y filas de
+relleno ajustables. drive() apunta trackvuelos al servidor y corre
+check_flights() una vez por frame, juntando lo que se habría mandado por
+Telegram.
+
+Uso:
+    python benchmarks/replay.py record [DIR] [--ticks N] [--interval S]
+    python benchmarks/replay.py synth [DIR]
+    python benchmarks/replay.py serve [DIR] [--port P] [--latency MS] [--padding N]
+
+DIR es benchmarks/fixtures/replay si no se indica; `serve` sin DIR usa el
+escenario sintético. `serve` deja el servidor corriendo para probar app.py
+a mano: exportar OPENSKY_URL=http://127.0.0.1:P/api/states/all y
+ADSB_ONE_URL=http://127.0.0.1:P/v2/hex/{} y avanzar de frame con
+`curl -X POST http://127.0.0.1:P/_replay/next`. Para simular una fuente
+lenta o caída: `curl -X POST 'http://127.0.0.1:P/_replay/fault/opensky?error_rate=1'`.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REPLAY_DIR = os.path.join(ROOT, "benchmarks", "fixtures", "replay")
+
+# Aeroparque -> Córdoba; el resto de la flota queda en tierra
+SCENARIO_FLIGHT = ("e0659a", "LV-FVZ", (-34.5592, -58.4156), (-31.3233, -64.2080))
+# Avión que OpenSky no ve y solo aparece en ADSB.one
+SCENARIO_ADSB_ONLY = ("e0b341", "LV-KMA", (-34.8222, -58.5358), (-32.9036, -60.7850))
+# Avión que solo ve OpenSky; se lo ve una vez en tierra y apaga el transpondedor
+SCENARIO_GROUND_ONCE = ("e030cf", "LV-CCO", (-31.3233, -64.2080), (-32.8317, -68.7929))
+SCENARIO_TICKS = 20
+SCENARIO_START_TS = 1700000000
+SCENARIO_INTERVAL = 30
+
+
+# --- Cassettes ---------------------------------------------------------------
+
+def save_cassette(path, frames):
+    os.makedirs(path, exist_ok=True)
+    for i, frame in enumerate(frames):
+        with open(os.path.join(path, f"{i:04d}.json"), "w") as f:
+            json.dump(frame, f)
+
+
+def load_cassette(path):
+    names = sorted(name for name in os.listdir(path) if name.endswith(".json"))
+    frames = []
+    for name in names:
+        with open(os.path.join(path, name)) as f:
+            frames.append(json.load(f))
+    return frames
+
+
+def record(path, ticks, interval, planes=None):
+    """Graba `ticks` frames reales de /states/all (global) y /v2/hex por avión."""
+    import requests
+
+    from trackvuelos.adsb_one import ADSB_ONE_URL
+    from trackvuelos.config import PLANES
+    from trackvuelos.opensky import OPENSKY_URL
+
+    planes = planes or PLANES
+    os.makedirs(path, exist_ok=True)
+    for i in range(ticks):
+        started = time.monotonic()
+        frame = {"ts": int(time.time()), "opensky": {"time": int(time.time()), "states": []}, "adsb_one": {}}
+        try:
+            response = requests.get(OPENSKY_URL, timeout=60)
+            if response.status_code == 200:
+                frame["opensky"] = response.json()
+            else:
+                print(f"  OpenSky status {response.status_code}")
+        except requests.RequestException as e:
+            print(f"  OpenSky error: {e}")
+        for icao24 in planes:
+            try:
+                response = requests.get(ADSB_ONE_URL.format(icao24), timeout=10)
+                if response.status_code == 200:
+                    frame["adsb_one"][icao24] = response.json()
+            except requests.RequestException as e:
+                print(f"  ADSB.one {icao24} error: {e}")
+            time.sleep(0.5)
+
+        with open(os.path.join(path, f"{i:04d}.json"), "w") as f:
+            json.dump(frame, f)
+        rows = len(frame["opensky"].get("states") or [])
+        print(f"📼 Frame {i}: {rows} filas de OpenSky, {len(frame['adsb_one'])} respuestas de ADSB.one")
+        if i + 1 < ticks:
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+# --- Escenario sintético -----------------------------------------------------
+
+def _interpolate(origin, destination, fraction):
+    return (origin[0] + (destination[0] - origin[0]) * fraction,
+            origin[1] + (destination[1] - origin[1]) * fraction)
+
+
+def _heading(origin, destination):
+    d_lon = math.radians(destination[1] - origin[1])
+    lat1, lat2 = math.radians(origin[0]), math.radians(destination[0])
+    x = math.sin(d_lon) * math.cos(lat2)
+    y = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(d_lon)
+    return (math.degrees(math.atan2(x, y)) + 360) % 360
+
+
+def _profile(tick, first, last, cruise_m):
+    """Altitud (m), velocidad (m/s) y régimen vertical (m/s) en cada fase."""
+    climb = descent = 4
+    if tick < first + climb:
+        altitude = cruise_m * (tick - first + 1) / climb
+        return altitude, 120 + 25 * (tick - first), 10.0
+    if tick > last - descent:
+        altitude = cruise_m * (last - tick + 1) / (descent + 1)
+        return altitude, 180 - 20 * (tick - (last - descent)), -8.0
+    return cruise_m, 220.0, 0.0
+
+
+def opensky_state(icao24, callsign, ts, lat, lon, altitude, velocity, heading, vertical_rate, on_ground=False):
+    """Fila de /states/all con el orden de campos de OpenSky."""
+    return [icao24, f"{callsign:<8}", "Argentina", ts, ts, lon, lat, altitude,
+            on_ground, velocity, heading, vertical_rate, None, altitude, "1234", False, 0]
+
+
+def adsb_one_body(icao24, registration, ts, lat, lon, altitude_m, velocity_ms, heading, vertical_rate_ms,
+                  on_ground=False):
+    aircraft = {
+        "hex": icao24, "flight": registration.replace("-", "") + " ", "r": registration,
+        "alt_baro": "ground" if on_ground else round(altitude_m / 0.3048), "gs": round(velocity_ms * 1.94384, 1),
+        "lat": lat, "lon": lon, "track": round(heading, 1), "squawk": "1234",
+        "seen": 0.5, "seen_pos": 0.5,
+    }
+    if vertical_rate_ms is not None:
+        aircraft["baro_rate"] = round(vertical_rate_ms * 196.85)
+    return {"ac": [aircraft], "total": 1, "now": ts * 1000, "msg": "No error"}
+
+
+def _empty_adsb_one(ts):
+    return {"ac": [], "total": 0, "now": ts * 1000, "msg": "No error"}
+
+
+def synthetic_frames(ticks=SCENARIO_TICKS):
+    """Vuelo de LV-FVZ: carreteo, despegue, crucero (con un hueco de OpenSky
+    que cubre ADSB.one y un tick que no lo ve ninguna), aterrizaje y carreteo
+    hasta apagar el transpondedor. Un vuelo corto de LV-KMA que solo ve
+    ADSB.one y se pierde en la aproximación, sin datos en tierra. Y LV-CCO,
+    que solo ve OpenSky: se lo ve una sola vez en tierra (sin altitud, como
+    manda OpenSky) y desaparece.
+
+    Devuelve (frames, esperado), con `esperado` = [(tick, "takeoff"|"landing", matrícula)].
+    """
+    flight_first, flight_last, gap, blackout = 2, 15, 9, 11
+    # Ticks en tierra antes y después del vuelo (LANDING_GROUND_DEBOUNCE = 2)
+    taxi = 2
+    adsb_first, adsb_last = 4, 10
+    # Perdido en aproximación: aterriza tras LANDING_APPROACH_TIMEOUT (90 s = 3 ticks)
+    approach_ticks = 3
+    ground_first, ground_last = 1, 5
+    frames = []
+    for tick in range(ticks):
+        ts = SCENARIO_START_TS + tick * SCENARIO_INTERVAL
+        states = []
+        adsb = {}
+
+        icao24, registration, origin, destination = SCENARIO_FLIGHT
+        callsign = registration.replace("-", "")
+        heading = _heading(origin, destination)
+        if flight_first <= tick <= flight_last and tick != blackout:
+            lat, lon = _interpolate(origin, destination, (tick - flight_first) / (flight_last - flight_first))
+            altitude, velocity, vertical_rate = _profile(tick, flight_first, flight_last, 11000)
+            if tick != gap:
+                states.append(opensky_state(icao24, callsign, ts, lat, lon,
+                                            altitude, velocity, heading, vertical_rate))
+            adsb[icao24] = adsb_one_body(icao24, registration, ts, lat, lon, altitude, velocity,
+                                         heading, vertical_rate)
+        elif flight_first - taxi <= tick < flight_first or flight_last < tick <= flight_last + taxi:
+            lat, lon = origin if tick < flight_first else destination
+            states.append(opensky_state(icao24, callsign, ts, lat, lon, None, 8.0, heading, None, on_ground=True))
+            adsb[icao24] = adsb_one_body(icao24, registration, ts, lat, lon, 0, 8.0, heading, None, on_ground=True)
+
+        icao24, registration, origin, destination = SCENARIO_ADSB_ONLY
+        if adsb_first <= tick <= adsb_last:
+            lat, lon = _interpolate(origin, destination, (tick - adsb_first) / (adsb_last - adsb_first))
+            altitude, velocity, vertical_rate = _profile(tick, adsb_first, adsb_last, 6000)
+            adsb[icao24] = adsb_one_body(icao24, registration, ts, lat, lon, altitude, velocity,
+                                         _heading(origin, destination), vertical_rate)
+
+        icao24, registration, origin, destination = SCENARIO_GROUND_ONCE
+        callsign = registration.replace("-", "")
+        heading = _heading(origin, destination)
+        if ground_first <= tick <= ground_last:
+            lat, lon = _interpolate(origin, destination, (tick - ground_first) / (ground_last - ground_first))
+            altitude, velocity, vertical_rate = _profile(tick, ground_first, ground_last, 9000)
+            states.append(opensky_state(icao24, callsign, ts, lat, lon, altitude, velocity, heading, vertical_rate))
+        elif tick == ground_last + 1:
+            lat, lon = destination
+            states.append(opensky_state(icao24, callsign, ts, lat, lon, None, 8.0, heading, None, on_ground=True))
+
+        frames.append({"ts": ts, "opensky": {"time": ts, "states": states}, "adsb_one": adsb})
+
+    expected = [
+        (flight_first, "takeoff", SCENARIO_FLIGHT[1]),
+        (adsb_first, "takeoff", SCENARIO_ADSB_ONLY[1]),
+        (adsb_last + approach_ticks, "landing", SCENARIO_ADSB_ONLY[1]),
+        (flight_last + taxi, "landing", SCENARIO_FLIGHT[1]),
+        (ground_first, "takeoff", SCENARIO_GROUND_ONCE[1]),
+        # Ya visto en tierra: alcanza con LANDING_APPROACH_TIMEOUT
+        (ground_last + 1 + approach_ticks, "landing", SCENARIO_GROUND_ONCE[1]),
+    ]
+    return frames, sorted(expected)
+
+
+def padding_states(n, seed=42):
+    """Filas de aviones ajenos a la flota, para inflar el feed global."""
+    rng = random.Random(seed)
+    return [
+        opensky_state(f"{rng.randrange(0x100000, 0xe00000):06x}", f"PAD{i % 9999:04d}", SCENARIO_START_TS,
+                      rng.uniform(-60, 60), rng.uniform(-180, 180), rng.uniform(0, 12000),
+                      rng.uniform(0, 300), rng.uniform(0, 360), rng.uniform(-20, 20))
+        for i in range(n)
+    ]
+
+
+# --- Servidor ----------------------------------------------------------------
+
+def _in_bbox(state, bbox):
+    lon, lat = state[5], state[6]
+    if lat is None or lon is None:
+        return False
+    return bbox["lamin"] <= lat <= bbox["lamax"] and bbox["lomin"] <= lon <= bbox["lomax"]
+
+
+class StubServer:
+    """Servidor HTTP local que imita /api/states/all y /v2/hex/<hex>.
+
+    `frame` elige qué tick se sirve; `latency` (segundos) se agrega a cada
+    respuesta y `padding` filas ajenas a la flota se suman al feed de
+    OpenSky. El relleno se serializa una sola vez por filtro, así el costo
+    de armar la respuesta no se mezcla con el del cliente. set_fault()
+    inyecta demoras y errores por fuente.
+    """
+
+    def __init__(self, frames, latency=0.0, padding=0, host="127.0.0.1", port=0):
+        self.frames = frames
+        self.latency = latency
+        self.padding = padding_states(padding) if padding else []
+        self.frame = 0
+        self.requests = {"opensky": 0, "adsb_one": 0}
+        self.faults = {"opensky": {}, "adsb_one": {}}
+        self._rng = random.Random(7)
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def opensky_url(self):
+        return f"{self.base_url}/api/states/all"
+
+    @property
+    def adsb_one_url(self):
+        return f"{self.base_url}/v2/hex/{{}}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="replay-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def set_fault(self, source, latency=0.0, error_rate=0.0, status=503, slow_rate=0.0, slow_latency=0.0):
+        """Demora extra de `source` ("opensky" o "adsb_one") en todas las
+        respuestas, `error_rate` de respuestas con `status` y `slow_rate`
+        de respuestas con `slow_latency` adicional. Sin argumentos, la limpia."""
+        with self._lock:
+            self.faults[source] = {"latency": latency, "error_rate": error_rate, "status": status,
+                                   "slow_rate": slow_rate, "slow_latency": slow_latency}
+
+    def _fault(self, source):
+        """(demora extra, status de error o None) para la próxima respuesta."""
+        with self._lock:
+            fault = self.faults[source]
+            if not fault:
+                return 0.0, None
+            delay = fault["latency"]
+            if fault["slow_rate"] and self._rng.random() < fault["slow_rate"]:
+                delay += fault["slow_latency"]
+            failed = fault["error_rate"] and self._rng.random() < fault["error_rate"]
+        return delay, fault["status"] if failed else None
+
+    def _current(self):
+        return self.frames[min(self.frame, len(self.frames) - 1)]
+
+    @staticmethod
+    def _filter(states, query):
+        if "icao24" in query:
+            wanted = {icao24.lower() for icao24 in query["icao24"]}
+            states = [state for state in states if state[0] in wanted]
+        if "lamin" in query:
+            bbox = {k: float(query[k][0]) for k in ("lamin", "lomin", "lamax", "lomax")}
+            states = [state for state in states if _in_bbox(state, bbox)]
+        return states
+
+    def opensky_body(self, query):
+        key = tuple(sorted((k, tuple(v)) for k, v in query.items()))
+        with self._lock:
+            padding = self._cache.get(key)
+        if padding is None:
+            # El relleno es igual en todos los frames: se serializa una vez por filtro
+            padding = json.dumps(self._filter(self.padding, query))[1:-1].encode()
+            with self._lock:
+                self._cache[key] = padding
+
+        data = self._current()["opensky"]
+        rows = json.dumps(self._filter(data.get("states") or [], query))[1:-1].encode()
+        if not rows and not padding:
+            return json.dumps({"time": data.get("time"), "states": None}).encode()
+        states = b",".join(part for part in (rows, padding) if part)
+        return b'{"time": %d, "states": [%s]}' % (data.get("time") or 0, states)
+
+    def adsb_one_body(self, icao24):
+        frame = self._current()
+        data = frame["adsb_one"].get(icao24) or _empty_adsb_one(frame.get("ts", 0))
+        return json.dumps(data).encode()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers y cuerpo van en writes separados: sin esto el ACK
+            # demorado agrega ~40 ms por respuesta
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, headers=None, delay=0.0):
+                if server.latency or delay:
+                    time.sleep(server.latency + delay)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path == "/api/states/all":
+                    with server._lock:
+                        server.requests["opensky"] += 1
+                    delay, error = server._fault("opensky")
+                    if error:
+                        self._send(error, b'{"error": "injected"}', delay=delay)
+                        return
+                    self._send(200, server.opensky_body(parse_qs(url.query)),
+                               {"X-Rate-Limit-Remaining": "4000"}, delay=delay)
+                elif url.path.startswith("/v2/hex/"):
+                    with server._lock:
+                        server.requests["adsb_one"] += 1
+                    delay, error = server._fault("adsb_one")
+                    if error:
+                        self._send(error, b'{"error": "injected"}', delay=delay)
+                        return
+                    self._send(200, server.adsb_one_body(url.path.rsplit("/", 1)[-1].lower()), delay=delay)
+                else:
+                    self._send(404, b'{"error": "not found"}')
+
+            def do_POST(self):
+                url = urlsplit(self.path)
+                if url.path == "/_replay/next":
+                    server.frame = min(server.frame + 1, len(server.frames) - 1)
+                elif url.path.startswith("/_replay/frame/"):
+                    server.frame = int(url.path.rsplit("/", 1)[-1])
+                elif url.path.startswith("/_replay/fault/"):
+                    # ?latency=S&error_rate=F&status=N&slow_rate=F&slow_latency=S; sin query, limpia
+                    query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                    server.set_fault(url.path.rsplit("/", 1)[-1],
+                                     **{k: int(v) if k == "status" else float(v) for k, v in query.items()})
+                else:
+                    self._send(404, b'{"error": "not found"}')
+                    return
+                self._send(200, json.dumps({"frame": server.frame}).encode())
+
+        return Handler
+
+
+# --- Ejecución de check_flights() --------------------------------------------
+
+def configure(workdir, server, mode="icao24"):
+    """Variables de entorno para que trackvuelos use el servidor y `workdir`.
+
+    Hay que llamarla antes de importar trackvuelos: las URLs y rutas se leen
+    al importar.
+    """
+    os.environ.update({
+        "OPENSKY_URL": server.opensky_url,
+        "ADSB_ONE_URL": server.adsb_one_url,
+        "OPENSKY_QUERY_MODE": mode,
+        "STATE_FILE": os.path.join(workdir, "plane_state.json"),
+        "HISTORY_DIR": os.path.join(workdir, "flight_history"),
+        "FLIGHT_DB": os.path.join(workdir, "flights.db"),
+        "TELEGRAM_SPOOL_DIR": os.path.join(workdir, "telegram_spool"),
+        "HTTP_RETRIES": "0",
+    })
+    os.environ.pop("TELEGRAM_TOKEN", None)
+    os.environ.pop("FLEET_FILE", None)
+
+
+def classify(message):
+    """Eventos de un mensaje (posiblemente coalescido) de Telegram."""
+    events = []
+    for line in message.splitlines():
+        words = line.split()
+        if len(words) == 3 and words[2] == "despegó":
+            events.append(("takeoff", words[1]))
+        elif len(words) == 4 and words[2:] == ["en", "curso"]:
+            events.append(("takeoff", words[1]))
+        elif len(words) == 3 and words[2] == "aterrizó":
+            events.append(("landing", words[1]))
+    return events
+
+
+def drive(tracker, server, frames, on_tick=None):
+    """Corre check_flights() una vez por frame y devuelve los eventos
+    notificados como [(tick, tipo, matrícula)].
+
+    `on_tick(tick, elapsed_s, planes_info)` se llama después de cada tick.
+    El reloj del tracker es el `ts` de cada frame, así los plazos de
+    flight_phase corren al ritmo del cassette.
+    """
+    sent = []
+    tracker.notify_telegram = sent.append
+    events = []
+    for tick in range(len(frames)):
+        server.frame = tick
+        ts = frames[tick].get("ts")
+        tracker.clock = (lambda ts=ts: ts) if ts else time.time
+        del sent[:]
+        started = time.perf_counter()
+        planes_info = tracker.check_flights()
+        elapsed = time.perf_counter() - started
+        for message in sent:
+            events.extend((tick, kind, registration) for kind, registration in classify(message))
+        if on_tick:
+            on_tick(tick, elapsed, planes_info)
+    return sorted(events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="grabar respuestas reales")
+    rec.add_argument("path", nargs="?", default=REPLAY_DIR)
+    rec.add_argument("--ticks", type=int, default=10)
+    rec.add_argument("--interval", type=float, default=30)
+    synth = sub.add_parser("synth", help="escribir el escenario sintético")
+    synth.add_argument("path", nargs="?", default=REPLAY_DIR)
+    serve = sub.add_parser("serve", help="servir un cassette")
+    serve.add_argument("path", nargs="?")
+    serve.add_argument("--port", type=int, default=8001)
+    serve.add_argument("--latency", type=float, default=0, help="milisegundos por respuesta")
+    serve.add_argument("--padding", type=int, default=0, help="filas extra en /states/all")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.path, args.ticks, args.interval)
+    elif args.command == "synth":
+        frames, expected = synthetic_frames()
+        save_cassette(args.path, frames)
+        print(f"📼 {len(frames)} frames en {args.path}; eventos esperados: {expected}")
+    else:
+        frames = load_cassette(args.path) if args.path else synthetic_frames()[0]
+        server = StubServer(frames, args.latency / 1000, args.padding, port=args.port).start()
+        print(f"Sirviendo {len(frames)} frames en {server.base_url}")
+        print(f"  OPENSKY_URL={server.opensky_url}")
+        print(f"  ADSB_ONE_URL={server.adsb_one_url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
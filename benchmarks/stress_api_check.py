@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Dispara N llamadas concurrentes a /api/check y verifica que se coalescen.
+
+Uso:
+    python benchmarks/stress_api_check.py [N]
+
+Las consultas a OpenSky/ADSB.one y Telegram se reemplazan por funciones
+locales con demora, así que no usa red. Falla si hubo más de una consulta
+upstream por ventana o alertas duplicadas.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Estado, historial y base en un directorio temporal
+WORKDIR = tempfile.mkdtemp(prefix="stress_api_check_")
+os.chdir(WORKDIR)
+os.environ["HISTORY_DIR"] = os.path.join(WORKDIR, "flight_history")
+os.environ["FLIGHT_DB"] = os.path.join(WORKDIR, "flights.db")
+os.environ["ENABLE_MONITOR"] = "false"
+
+import app  # noqa: E402
+from trackvuelos.observation import Observation  # noqa: E402
+
+UPSTREAM_DELAY = 0.5
+upstream_calls = []
+telegram_messages = []
+counter_lock = threading.Lock()
+
+
+def fake_check_opensky(fleet, icao24s=None):
+    with counter_lock:
+        upstream_calls.append(time.monotonic())
+    time.sleep(UPSTREAM_DELAY)
+    now = time.time()
+    return {
+        "e0659a": Observation(
+            icao24="e0659a", callsign="LVFVZ", altitude=3000, velocity=600.0,
+            country="Argentina", lat=-34.6, lon=-58.4, heading=270, baro_rate=1500,
+            squawk="", on_ground=False, position_time=now, contact_time=now, source="OpenSky",
+        )
+    }
+
+
+def fake_notify_telegram(msg):
+    with counter_lock:
+        telegram_messages.append(msg)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    app.tracker.check_opensky = fake_check_opensky
+    app.tracker.check_adsb_one_many = lambda icao24s: {}
+    app.tracker.notify_telegram = fake_notify_telegram
+    # TTL 0: cada request encuentra el snapshot vencido e intenta refrescarlo
+    app.snapshot_cache.ttl = 0
+
+    client = app.app.test_client()
+    barrier = threading.Barrier(n)
+    statuses = []
+
+    def worker():
+        barrier.wait()
+        response = client.get("/api/check")
+        with counter_lock:
+            statuses.append(response.status_code)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"Requests: {n} en {elapsed:.2f}s, status 200: {statuses.count(200)}")
+    print(f"Consultas upstream: {len(upstream_calls)}")
+    print(f"Mensajes de Telegram: {len(telegram_messages)}")
+
+    assert statuses.count(200) == n, "hubo requests fallidos"
+    assert len(upstream_calls) == 1, "más de una consulta upstream en la ventana"
+    assert len(telegram_messages) == 1, "alertas duplicadas"
+    print("✅ OK: una sola consulta upstream y una sola alerta")
+
+
+if __name__ == "__main__":
+    main()
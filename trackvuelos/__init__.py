@@ -0,0 +1,46 @@
+"""Núcleo de trackvuelosprivados.
+
+Los submódulos se importan recién cuando se usan: ``trackvuelos.PLANES`` solo
+carga la configuración y ``trackvuelos.check_flights`` trae el motor completo
+(numpy, sqlite3). Así el handler de Vercel arranca sin pagar lo que no usa.
+"""
+import importlib
+
+_SUBMODULES = {
+    "adsb_one", "airport_index", "airports", "atomic", "breaker", "broadcast",
+    "config", "event_log", "fleet", "flight_phase", "flight_store", "fusion",
+    "log", "messages", "metrics", "notify", "observation", "opensky",
+    "plane_state", "ratelimit", "singleflight", "snapshot", "track", "tracker",
+    "transport",
+}
+
+_EXPORTS = {
+    "PLANES": "config",
+    "Fleet": "fleet",
+    "FleetRegistry": "fleet",
+    "load_fleet": "fleet",
+    "ARGENTINA_AIRPORTS": "config",
+    "ARGENTINA_TZ": "config",
+    "OpenSkyError": "opensky",
+    "check_opensky": "opensky",
+    "fetch_states": "opensky",
+    "notify_telegram": "notify",
+    "check_flights": "tracker",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    if name in _EXPORTS:
+        module = importlib.import_module(f".{_EXPORTS[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES | set(_EXPORTS))
@@ -0,0 +1,119 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from . import metrics, transport
+from .log import run_in_context
+from .observation import FEET_TO_M, KNOTS_TO_KMH, Observation
+from .ratelimit import TokenBucket
+
+ADSB_ONE_URL = os.getenv("ADSB_ONE_URL", "https://api.adsb.one/v2/hex/{}")
+ADSB_ONE_TIMEOUT = float(os.getenv("ADSB_ONE_TIMEOUT", "5"))
+
+# Consultas simultáneas y ritmo máximo (reemplaza el sleep de 0.5 s entre aviones)
+ADSB_ONE_CONCURRENCY = int(os.getenv("ADSB_ONE_CONCURRENCY", "4"))
+ADSB_ONE_RATE = float(os.getenv("ADSB_ONE_RATE", "2"))
+ADSB_ONE_BURST = int(os.getenv("ADSB_ONE_BURST", "5"))
+
+# Una sola sesión keep-alive compartida por todos los workers
+_session = transport.get_session(ADSB_ONE_URL, pool_maxsize=ADSB_ONE_CONCURRENCY)
+
+logger = logging.getLogger(__name__)
+
+_bucket = TokenBucket(ADSB_ONE_RATE, ADSB_ONE_BURST)
+_executor = ThreadPoolExecutor(max_workers=ADSB_ONE_CONCURRENCY, thread_name_prefix="adsb-one")
+
+
+class AdsbOneError(Exception):
+    pass
+
+
+def fetch_adsb_one(icao24):
+    """Primer avión de /v2/hex/<icao24> y el `now` de la respuesta (ms), o
+    None si ADSB.one no lo ve. Lanza la excepción si la consulta falla."""
+    _bucket.acquire()
+    try:
+        with metrics.span("adsb_one_fetch"):
+            response = _session.get(ADSB_ONE_URL.format(icao24), timeout=transport.timeouts(ADSB_ONE_TIMEOUT))
+            body = response.content
+    except requests.RequestException:
+        metrics.upstream_requests.inc("adsb_one", "error")
+        raise
+    metrics.upstream_requests.inc("adsb_one", response.status_code)
+    metrics.bytes_downloaded.inc("adsb_one", amount=len(body))
+    logger.debug("ADSB.one %s: status %s", icao24, response.status_code,
+                 extra={"icao24": icao24, "status": response.status_code, "bytes": len(body)})
+    if response.status_code != 200:
+        raise AdsbOneError(f"status {response.status_code}")
+    data = response.json()
+    metrics.rows_scanned.inc("adsb_one", amount=len(data.get("ac") or ()))
+    if data.get("total", 0) > 0 and data.get("ac"):
+        return data["ac"][0], data.get("now")
+    return None
+
+
+def parse_aircraft(aircraft, now_ms=None):
+    """Observation en metros y km/h; los tiempos salen de `now` - `seen`/`seen_pos`."""
+    now = now_ms / 1000 if now_ms else time.time()
+    alt_baro = aircraft.get("alt_baro")
+    on_ground = alt_baro == "ground"
+    if on_ground:
+        altitude = 0
+    elif isinstance(alt_baro, (int, float)):
+        altitude = round(alt_baro * FEET_TO_M)
+    else:
+        altitude = None
+    gs = aircraft.get("gs")
+    baro_rate = aircraft.get("baro_rate", aircraft.get("geom_rate"))
+    seen = aircraft.get("seen")
+    contact_time = now - seen if seen is not None else now
+    seen_pos = aircraft.get("seen_pos")
+    if aircraft.get("lat") is None:
+        position_time = None
+    else:
+        position_time = now - seen_pos if seen_pos is not None else contact_time
+    return Observation(
+        icao24=aircraft.get("hex", "").lower(),
+        callsign=aircraft.get("flight", "").strip() or aircraft.get("r", ""),
+        altitude=altitude,
+        velocity=round(gs * KNOTS_TO_KMH, 1) if gs is not None else None,
+        country=None,
+        lat=aircraft.get("lat"),
+        lon=aircraft.get("lon"),
+        heading=aircraft.get("track"),
+        baro_rate=round(baro_rate) if isinstance(baro_rate, (int, float)) else None,
+        squawk=aircraft.get("squawk", ""),
+        on_ground=on_ground,
+        position_time=position_time,
+        contact_time=contact_time,
+        source="ADSB.one",
+    )
+
+
+def _observe(icao24):
+    try:
+        found = fetch_adsb_one(icao24)
+    except Exception as e:
+        logger.warning("ADSB.one error para %s: %s", icao24, e, extra={"icao24": icao24})
+        return e
+    return parse_aircraft(*found) if found else None
+
+
+def check_adsb_one_many(icao24s):
+    """Consulta varios aviones en paralelo y devuelve sus Observation por
+    icao24; la demora es la de la consulta más lenta. Lanza AdsbOneError si
+    fallaron todas las consultas."""
+    icao24s = list(icao24s)
+    results = {}
+    errors = 0
+    for icao24, found in zip(icao24s, run_in_context(_executor, _observe, icao24s)):
+        if isinstance(found, Exception):
+            errors += 1
+        elif found is not None:
+            results[icao24] = found
+    if icao24s and errors == len(icao24s):
+        raise AdsbOneError(f"fallaron las {errors} consultas")
+    return results
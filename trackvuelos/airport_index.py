@@ -0,0 +1,233 @@
+import hashlib
+import io
+import logging
+import math
+import os
+
+import numpy as np
+
+from .airports import EARTH_RADIUS_KM, bearings_deg, distances_km
+from .atomic import atomic_write
+
+AIRPORT_INDEX_CELL_DEG = float(os.getenv("AIRPORT_INDEX_CELL_DEG", "1"))
+AIRPORT_INDEX_FILE = os.getenv("AIRPORT_INDEX_FILE", "airport_index.npz")
+# Con pocos aeropuertos el barrido vectorizado completo es más rápido que el índice
+AIRPORT_INDEX_MIN_AIRPORTS = int(os.getenv("AIRPORT_INDEX_MIN_AIRPORTS", "512"))
+
+logger = logging.getLogger(__name__)
+
+
+def table_fingerprint(table, cell_deg):
+    digest = hashlib.sha1()
+    digest.update(table.lat_deg.tobytes())
+    digest.update(table.lon_deg.tobytes())
+    digest.update(str(cell_deg).encode())
+    return digest.hexdigest()
+
+
+class GridIndex:
+    """Grilla lat/lon (tipo geohash) sobre un AirportTable.
+
+    Los aeropuertos se ordenan por celda, así cada celda es un rango contiguo
+    de `order`. Las consultas recorren anillos de celdas alrededor del avión
+    y solo calculan distancias exactas sobre los candidatos.
+    """
+
+    def __init__(self, table, cell_deg, order, cell_start, cell_end):
+        self.table = table
+        self.cell_deg = cell_deg
+        self.rows = int(math.ceil(180 / cell_deg))
+        self.cols = int(math.ceil(360 / cell_deg))
+        self.order = order
+        # Arrays densos rows*cols: rango [start, end) de `order` de cada celda
+        self.cell_start = cell_start
+        self.cell_end = cell_end
+
+    @classmethod
+    def build(cls, table, cell_deg=AIRPORT_INDEX_CELL_DEG):
+        rows = int(math.ceil(180 / cell_deg))
+        cols = int(math.ceil(360 / cell_deg))
+        row = np.clip(((table.lat_deg + 90) // cell_deg).astype(np.int64), 0, rows - 1)
+        col = ((table.lon_deg + 180) // cell_deg).astype(np.int64) % cols
+        cell = row * cols + col
+
+        order = np.argsort(cell, kind="stable")
+        cells = np.arange(rows * cols)
+        sorted_cells = cell[order]
+        cell_start = np.searchsorted(sorted_cells, cells, side="left")
+        cell_end = np.searchsorted(sorted_cells, cells, side="right")
+        return cls(table, cell_deg, order, cell_start, cell_end)
+
+    def save(self, path):
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            fingerprint=np.array(table_fingerprint(self.table, self.cell_deg)),
+            cell_deg=np.array(self.cell_deg),
+            order=self.order, cell_start=self.cell_start, cell_end=self.cell_end,
+        )
+        atomic_write(path, buffer.getvalue())
+
+    @classmethod
+    def load(cls, path, table, cell_deg=AIRPORT_INDEX_CELL_DEG):
+        """Carga el índice serializado; None si no existe o es de otra tabla."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                if str(data["fingerprint"]) != table_fingerprint(table, cell_deg):
+                    return None
+                return cls(table, float(data["cell_deg"]), data["order"],
+                           data["cell_start"], data["cell_end"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _cell_of(self, lat, lon):
+        row = min(max(int((lat + 90) // self.cell_deg), 0), self.rows - 1)
+        col = int((lon + 180) // self.cell_deg) % self.cols
+        return row, col
+
+    def _gather(self, keys):
+        """Índices de aeropuertos de un conjunto de celdas, sin loops en Python."""
+        keys = np.unique(keys)
+        starts = self.cell_start[keys]
+        lengths = self.cell_end[keys] - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.array([], dtype=np.int64)
+        # Concatenación vectorizada de los rangos [start, end) de cada celda
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return self.order[offsets + np.arange(total)]
+
+    def _ring(self, row, col, radius):
+        """Índices de aeropuertos en las celdas a distancia de Chebyshev `radius`."""
+        if radius == 0:
+            rows, cols = np.array([row]), np.array([col])
+        else:
+            span = np.arange(-radius, radius + 1)
+            inner = np.arange(-radius + 1, radius)
+            rows = np.concatenate((np.full(len(span), row - radius), np.full(len(span), row + radius),
+                                   row + inner, row + inner))
+            cols = np.concatenate((col + span, col + span,
+                                   np.full(len(inner), col - radius), np.full(len(inner), col + radius)))
+        valid = (rows >= 0) & (rows < self.rows)
+        return self._gather(rows[valid] * self.cols + cols[valid] % self.cols)
+
+    def _outside_bound_km(self, lat, lon, row, col, radius):
+        """Distancia mínima desde el avión a cualquier punto fuera del cuadrado buscado."""
+        lat_lo = (row - radius) * self.cell_deg - 90
+        lat_hi = (row + radius + 1) * self.cell_deg - 90
+        lon_lo = (col - radius) * self.cell_deg - 180
+        lon_hi = (col + radius + 1) * self.cell_deg - 180
+
+        covers_lat = lat_lo <= -90 and lat_hi >= 90
+        covers_lon = (2 * radius + 1) >= self.cols
+        if covers_lat and covers_lon:
+            return math.inf
+
+        bound = math.inf
+        if not covers_lat:
+            gaps = []
+            if lat_lo > -90:
+                gaps.append(lat - lat_lo)
+            if lat_hi < 90:
+                gaps.append(lat_hi - lat)
+            bound = min(bound, math.radians(min(gaps)) * EARTH_RADIUS_KM)
+        if not covers_lon:
+            # Unwrapping de la longitud del avión al rango de columnas buscado
+            lon_unwrapped = lon + 360 * round((lon_lo + lon_hi) / 2 / 360 - lon / 360)
+            dlon = math.radians(min(lon_unwrapped - lon_lo, lon_hi - lon_unwrapped))
+            max_abs_lat = math.radians(min(90, max(abs(lat_lo), abs(lat_hi))))
+            lon_bound = 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.cos(max_abs_lat) * math.sin(dlon / 2)))
+            bound = min(bound, lon_bound)
+        return bound
+
+    def nearest(self, lat, lon, k=1):
+        """Los k aeropuertos más cercanos: (índices, distancias en km), ordenados."""
+        k = min(k, len(self.table))
+        row, col = self._cell_of(lat, lon)
+        chunks = []
+        count = 0
+        radius = 0
+        while True:
+            ring = self._ring(row, col, radius)
+            if len(ring):
+                chunks.append(ring)
+                count += len(ring)
+            bound = self._outside_bound_km(lat, lon, row, col, radius)
+            if count >= k:
+                candidates = np.concatenate(chunks)
+                distances = _subset_distances(self.table, candidates, lat, lon)
+                best = np.argsort(distances, kind="stable")[:k]
+                if distances[best[-1]] <= bound or math.isinf(bound):
+                    return candidates[best], distances[best]
+            elif math.isinf(bound):
+                return np.array([], dtype=np.int64), np.array([])
+            radius += 1
+
+    def _candidates_within(self, lat, lon, radius_km):
+        lat_span = math.degrees(radius_km / EARTH_RADIUS_KM)
+        max_abs_lat = min(90.0, abs(lat) + lat_span)
+        cos_lat = math.cos(math.radians(max_abs_lat))
+        lon_span = 180.0 if cos_lat < 1e-6 else min(180.0, lat_span / cos_lat)
+
+        row, col = self._cell_of(lat, lon)
+        d_rows = int(math.ceil(lat_span / self.cell_deg))
+        d_cols = min(int(math.ceil(lon_span / self.cell_deg)), self.cols // 2)
+
+        rows = np.arange(max(0, row - d_rows), min(self.rows, row + d_rows + 1))
+        cols = np.arange(col - d_cols, col + d_cols + 1) % self.cols
+        return self._gather((rows[:, None] * self.cols + cols[None, :]).ravel())
+
+    def within_radius(self, lat, lon, radius_km):
+        """Aeropuertos a menos de `radius_km`: (índices, distancias), del más cercano al más lejano."""
+        candidates = self._candidates_within(lat, lon, radius_km)
+        if not len(candidates):
+            return candidates, np.array([])
+        distances = _subset_distances(self.table, candidates, lat, lon)
+        mask = distances <= radius_km
+        candidates, distances = candidates[mask], distances[mask]
+        order = np.argsort(distances, kind="stable")
+        return candidates[order], distances[order]
+
+    def in_cone(self, lat, lon, heading, half_angle=45, max_km=3000, min_km=5):
+        """Aeropuertos dentro de ±`half_angle` del rumbo, entre `min_km` y `max_km`.
+
+        Devuelve (índices, diferencias angulares, distancias), del más alineado
+        al menos alineado.
+        """
+        candidates, distances = self.within_radius(lat, lon, max_km)
+        if not len(candidates):
+            return candidates, np.array([]), distances
+        bearings = bearings_deg(_Subset(self.table, candidates), lat, lon)[0]
+        angle_diff = np.abs(((bearings - heading + 180) % 360) - 180)
+        mask = (angle_diff < half_angle) & (distances > min_km)
+        candidates, angle_diff, distances = candidates[mask], angle_diff[mask], distances[mask]
+        order = np.argsort(angle_diff, kind="stable")
+        return candidates[order], angle_diff[order], distances[order]
+
+
+class _Subset:
+    """Vista mínima de un AirportTable para reutilizar los kernels sobre candidatos."""
+
+    def __init__(self, table, indices):
+        self.lat = table.lat[indices]
+        self.lon = table.lon[indices]
+        self.sin_lat = table.sin_lat[indices]
+        self.cos_lat = table.cos_lat[indices]
+
+
+def _subset_distances(table, indices, lat, lon):
+    return distances_km(_Subset(table, indices), lat, lon)[0]
+
+
+def load_or_build(table, path=AIRPORT_INDEX_FILE, cell_deg=AIRPORT_INDEX_CELL_DEG):
+    """Carga el índice serializado o lo construye y lo guarda para el próximo arranque."""
+    index = GridIndex.load(path, table, cell_deg)
+    if index is None:
+        index = GridIndex.build(table, cell_deg)
+        try:
+            index.save(path)
+        except OSError as e:
+            logger.warning("No se pudo guardar el índice de aeropuertos: %s", e)
+    return index
@@ -0,0 +1,163 @@
+import csv
+import os
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+# airports.csv de OurAirports (https://ourairports.com/data/); si no se
+# configura se usan los aeropuertos de ARGENTINA_AIRPORTS
+AIRPORTS_CSV = os.getenv("AIRPORTS_CSV")
+AIRPORT_TYPES = os.getenv("AIRPORT_TYPES", "large_airport,medium_airport,small_airport")
+# Códigos ISO de país separados por coma; vacío = todo el mundo
+AIRPORT_COUNTRIES = os.getenv("AIRPORT_COUNTRIES", "")
+
+DESTINATION_MAX_ANGLE = 45
+DESTINATION_MIN_DISTANCE_KM = 5
+# Radio del cono de destino
+DESTINATION_MAX_DISTANCE_KM = float(os.getenv("DESTINATION_MAX_DISTANCE_KM", "3000"))
+
+
+class AirportTable:
+    """Aeropuertos en arrays columnares con radianes y senos/cosenos precalculados."""
+
+    def __init__(self, codes, names, lats, lons):
+        self.codes = list(codes)
+        self.names = list(names)
+        # GridIndex opcional, lo asigna load_airport_table en tablas grandes
+        self.index = None
+        self.lat_deg = np.asarray(lats, dtype=np.float64)
+        self.lon_deg = np.asarray(lons, dtype=np.float64)
+        self.lat = np.radians(self.lat_deg)
+        self.lon = np.radians(self.lon_deg)
+        self.sin_lat = np.sin(self.lat)
+        self.cos_lat = np.cos(self.lat)
+        # Vectores unitarios en la esfera, útiles para índices espaciales
+        self.unit = np.column_stack((
+            self.cos_lat * np.cos(self.lon),
+            self.cos_lat * np.sin(self.lon),
+            self.sin_lat,
+        ))
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def from_dict(cls, airports):
+        codes = list(airports)
+        return cls(
+            codes,
+            [airports[code]["name"] for code in codes],
+            [airports[code]["lat"] for code in codes],
+            [airports[code]["lon"] for code in codes],
+        )
+
+    @classmethod
+    def from_ourairports_csv(cls, path, types=AIRPORT_TYPES, countries=AIRPORT_COUNTRIES):
+        types = {t.strip() for t in types.split(",") if t.strip()}
+        countries = {c.strip().upper() for c in countries.split(",") if c.strip()}
+        codes, names, lats, lons = [], [], [], []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if types and row["type"] not in types:
+                    continue
+                if countries and row["iso_country"].upper() not in countries:
+                    continue
+                codes.append(row.get("icao_code") or row["ident"])
+                names.append(row["name"])
+                lats.append(float(row["latitude_deg"]))
+                lons.append(float(row["longitude_deg"]))
+        return cls(codes, names, lats, lons)
+
+    def entry(self, index, distance):
+        return {"code": self.codes[index], "name": self.names[index], "distance": round(float(distance), 1)}
+
+
+def load_airport_table(default_airports):
+    if AIRPORTS_CSV:
+        table = AirportTable.from_ourairports_csv(AIRPORTS_CSV)
+    else:
+        table = AirportTable.from_dict(default_airports)
+
+    from .airport_index import AIRPORT_INDEX_MIN_AIRPORTS, load_or_build
+    if len(table) >= AIRPORT_INDEX_MIN_AIRPORTS:
+        table.index = load_or_build(table)
+    return table
+
+
+def _as_radians(lats, lons):
+    lat = np.radians(np.atleast_1d(np.asarray(lats, dtype=np.float64)))[:, None]
+    lon = np.radians(np.atleast_1d(np.asarray(lons, dtype=np.float64)))[:, None]
+    return lat, lon
+
+
+def distances_km(table, lats, lons):
+    """Matriz (aviones x aeropuertos) de distancias haversine en km."""
+    lat, lon = _as_radians(lats, lons)
+    sin_dlat = np.sin((table.lat[None, :] - lat) / 2)
+    sin_dlon = np.sin((table.lon[None, :] - lon) / 2)
+    a = sin_dlat ** 2 + np.cos(lat) * table.cos_lat[None, :] * sin_dlon ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bearings_deg(table, lats, lons):
+    """Matriz (aviones x aeropuertos) de rumbos iniciales hacia cada aeropuerto, 0-360."""
+    lat, lon = _as_radians(lats, lons)
+    dlon = table.lon[None, :] - lon
+    x = np.sin(dlon) * table.cos_lat[None, :]
+    y = np.cos(lat) * table.sin_lat[None, :] - np.sin(lat) * table.cos_lat[None, :] * np.cos(dlon)
+    return (np.degrees(np.arctan2(x, y)) + 360) % 360
+
+
+def nearest_airports(table, lats, lons):
+    """Índice y distancia del aeropuerto más cercano para cada avión."""
+    distances = distances_km(table, lats, lons)
+    indices = np.argmin(distances, axis=1)
+    return indices, distances[np.arange(len(indices)), indices]
+
+
+def destination_airports(table, lats, lons, headings):
+    """Aeropuerto más alineado con el rumbo (±45°, entre 5 km y
+    DESTINATION_MAX_DISTANCE_KM, como GridIndex.in_cone) para cada avión.
+
+    Devuelve índices (-1 si no hay candidato) y distancias.
+    """
+    distances = distances_km(table, lats, lons)
+    bearings = bearings_deg(table, lats, lons)
+    headings = np.atleast_1d(np.asarray(headings, dtype=np.float64))[:, None]
+    angle_diff = np.abs(((bearings - headings + 180) % 360) - 180)
+
+    candidate = ((angle_diff < DESTINATION_MAX_ANGLE) & (distances > DESTINATION_MIN_DISTANCE_KM)
+                 & (distances <= DESTINATION_MAX_DISTANCE_KM))
+    scores = np.where(candidate, angle_diff, np.inf)
+    indices = np.argmin(scores, axis=1)
+    rows = np.arange(len(indices))
+    indices = np.where(np.isfinite(scores[rows, indices]), indices, -1)
+    return indices, distances[rows, indices]
+
+
+def find_nearest_airport(table, lat, lon):
+    if lat is None or lon is None or not len(table):
+        return None
+    if table.index is not None:
+        indices, distances = table.index.nearest(lat, lon, k=1)
+    else:
+        indices, distances = nearest_airports(table, lat, lon)
+    return table.entry(indices[0], distances[0])
+
+
+def find_destination_airport(table, lat, lon, heading):
+    if lat is None or lon is None or heading is None or not len(table):
+        return None
+    if table.index is not None:
+        indices, _, distances = table.index.in_cone(
+            lat, lon, heading, DESTINATION_MAX_ANGLE,
+            DESTINATION_MAX_DISTANCE_KM, DESTINATION_MIN_DISTANCE_KM
+        )
+        if not len(indices):
+            return None
+    else:
+        indices, distances = destination_airports(table, lat, lon, heading)
+        if indices[0] < 0:
+            return None
+    return table.entry(indices[0], distances[0])
@@ -0,0 +1,132 @@
+"""Circuit breaker por fuente upstream.
+
+Cerrado: las consultas pasan y se anotan. Si en las últimas `window`
+consultas (al menos `min_calls`) la tasa de errores llega a `failure_rate`
+o el p95 de la latencia a `slow_seconds`, se abre: durante `open_seconds`
+la fuente no se consulta. Después queda semiabierto y deja pasar una sola
+consulta de prueba, que lo cierra si sale bien y rápida o lo vuelve a abrir.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from . import metrics
+
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+# Latencia p95 (segundos por unidad, ver record()) que abre el circuito
+BREAKER_SLOW_SECONDS = float(os.getenv("BREAKER_SLOW_SECONDS", "10"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "60"))
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+logger = logging.getLogger(__name__)
+
+breaker_state = metrics.Gauge(
+    "trackvuelos_breaker_state",
+    "Estado del circuit breaker de cada fuente (0 cerrado, 1 semiabierto, 2 abierto)",
+    ["source"],
+)
+breaker_rejected = metrics.Counter(
+    "trackvuelos_breaker_rejected_total",
+    "Consultas que no se hicieron porque el circuito estaba abierto",
+    ["source"],
+)
+
+
+class CircuitBreaker:
+    def __init__(self, name, window=BREAKER_WINDOW, min_calls=BREAKER_MIN_CALLS,
+                 failure_rate=BREAKER_FAILURE_RATE, slow_seconds=BREAKER_SLOW_SECONDS,
+                 open_seconds=BREAKER_OPEN_SECONDS):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_seconds = slow_seconds
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        self._calls = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial = False
+        breaker_state.set(0, name)
+
+    @property
+    def state(self):
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self._state
+
+    def _set_state(self, state, reason=""):
+        if state != self._state:
+            logger.warning("Circuito de %s: %s -> %s%s", self.name, self._state, state,
+                           f" ({reason})" if reason else "",
+                           extra={"source": self.name, "breaker": state})
+        self._state = state
+        breaker_state.set(_STATE_VALUES[state], self.name)
+
+    def _refresh(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._set_state(HALF_OPEN)
+            self._trial = False
+
+    def allow(self):
+        """True si se puede consultar ahora; en semiabierto, solo la primera vez."""
+        with self._lock:
+            self._refresh(time.monotonic())
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+        breaker_rejected.inc(self.name)
+        return False
+
+    def record(self, latency, ok, units=1):
+        """Anota una consulta. `units` divide la latencia para fuentes cuya
+        consulta es un lote de tamaño variable (ADSB.one: un pedido por avión)."""
+        latency /= max(1, units)
+        with self._lock:
+            now = time.monotonic()
+            if self._state == HALF_OPEN:
+                if ok and latency < self.slow_seconds:
+                    self._calls.clear()
+                    self._set_state(CLOSED, "consulta de prueba exitosa")
+                else:
+                    self._open(now, "falló la consulta de prueba")
+                return
+            if self._state == OPEN:
+                # Una consulta que arrancó antes de abrirse el circuito
+                return
+
+            self._calls.append((latency, ok))
+            if len(self._calls) < self.min_calls:
+                return
+            failures = sum(not call_ok for _, call_ok in self._calls) / len(self._calls)
+            p95 = metrics.percentile([call_latency for call_latency, _ in self._calls], 0.95)
+            if failures >= self.failure_rate:
+                self._open(now, f"{failures:.0%} de errores")
+            elif p95 >= self.slow_seconds:
+                self._open(now, f"p95 {p95:.1f} s")
+
+    def _open(self, now, reason):
+        self._opened_at = now
+        self._trial = False
+        self._calls.clear()
+        self._set_state(OPEN, reason)
+
+    def stats(self):
+        with self._lock:
+            self._refresh(time.monotonic())
+            calls = list(self._calls)
+            state = self._state
+            retry = max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)) if state == OPEN else None
+        return {
+            "state": state,
+            "calls": len(calls),
+            "failure_rate": round(sum(not ok for _, ok in calls) / len(calls), 3) if calls else None,
+            "retry_in_s": round(retry, 1) if retry is not None else None,
+        }
@@ -0,0 +1,124 @@
+"""Difusión de los aviones en vuelo a los navegadores por Server-Sent Events.
+
+El monitor llama a Broadcaster.publish() al final de cada verificación (es
+un listener de tracker). Cada cambio se serializa una sola vez y queda en un
+backlog compartido; cada conexión lee de ahí a su ritmo, así que publicar
+cuesta lo mismo con uno o con mil navegadores y una sola consulta upstream
+alimenta a todos.
+"""
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+# Segundos sin eventos tras los que se manda un comentario para que proxies
+# y navegadores no corten la conexión
+SSE_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", "15"))
+# Eventos que se guardan para los que se atrasan o reconectan con Last-Event-ID
+SSE_BACKLOG = int(os.getenv("SSE_BACKLOG", "64"))
+# Milisegundos que espera el navegador antes de reconectar
+SSE_RETRY_MS = int(os.getenv("SSE_RETRY_MS", "5000"))
+
+HEARTBEAT = b": ping\n\n"
+
+
+def sse_event(event, data, event_id=None):
+    """Un evento SSE ya codificado."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in json.dumps(data, ensure_ascii=False).splitlines())
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+class Broadcaster:
+    """Fan-out de snapshots y deltas de los aviones en vuelo.
+
+    Al conectarse, cada cliente recibe un `snapshot` con todos los aviones y
+    después un `delta` por verificación con cambios (`updated`: aviones
+    nuevos o que se movieron, `removed`: matrículas que aterrizaron). Un
+    cliente que se atrasa más que el backlog recibe un snapshot nuevo.
+    """
+
+    def __init__(self, heartbeat=SSE_HEARTBEAT, backlog=SSE_BACKLOG):
+        self.heartbeat = heartbeat
+        self._cond = threading.Condition()
+        self._events = deque(maxlen=max(1, backlog))
+        self._seq = 0
+        self._planes = {}
+        self._snapshot = self._encode_snapshot()
+        self.clients = 0
+        self.published = 0
+
+    def _encode_snapshot(self):
+        return sse_event("snapshot", {
+            "seq": self._seq,
+            "timestamp": datetime.now().isoformat(),
+            "planes_en_vuelo": len(self._planes),
+            "aviones": list(self._planes.values()),
+        }, self._seq)
+
+    def publish(self, planes_info):
+        """Publica los cambios respecto de la verificación anterior (si hay)."""
+        planes = {plane.registration: plane.to_dict() for plane in planes_info}
+        with self._cond:
+            previous = self._planes
+            updated = [plane for registration, plane in planes.items() if previous.get(registration) != plane]
+            removed = [registration for registration in previous if registration not in planes]
+            if not updated and not removed:
+                return False
+
+            self._seq += 1
+            self._planes = planes
+            self._events.append((self._seq, sse_event("delta", {
+                "seq": self._seq,
+                "timestamp": datetime.now().isoformat(),
+                "planes_en_vuelo": len(planes),
+                "updated": updated,
+                "removed": removed,
+            }, self._seq)))
+            self._snapshot = self._encode_snapshot()
+            self.published += 1
+            self._cond.notify_all()
+        return True
+
+    def _pending(self, seq):
+        """Eventos posteriores a `seq`, o None si ya salieron del backlog."""
+        if seq >= self._seq:
+            return []
+        if not self._events or self._events[0][0] > seq + 1:
+            return None
+        return [body for event_seq, body in self._events if event_seq > seq]
+
+    def stream(self, last_event_id=None):
+        """Generador de bytes para una conexión; termina cuando el cliente se va."""
+        with self._cond:
+            self.clients += 1
+            seq = None
+            if last_event_id is not None and last_event_id.isdigit():
+                seq = int(last_event_id)
+                if seq > self._seq or self._pending(seq) is None:
+                    seq = None
+            if seq is None:
+                seq, first = self._seq, self._snapshot
+            else:
+                first = b""
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n".encode() + first
+            while True:
+                with self._cond:
+                    pending = self._pending(seq)
+                    if pending == []:
+                        self._cond.wait(self.heartbeat)
+                        pending = self._pending(seq)
+                    if pending is None:
+                        chunk = self._snapshot
+                    else:
+                        chunk = b"".join(pending)
+                    seq = self._seq
+                yield chunk or HEARTBEAT
+        finally:
+            with self._cond:
+                self.clients -= 1
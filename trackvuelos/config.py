@@ -0,0 +1,31 @@
+import os
+from datetime import timezone, timedelta
+
+ARGENTINA_TZ = timezone(timedelta(hours=-3))
+
+PLANES = {
+    "e0659a": "LV-FVZ",
+    "e030cf": "LV-CCO",
+    "e06546": "LV-FUF",
+    "e0b341": "LV-KMA",
+    "e0b058": "LV-KAX",
+}
+
+ARGENTINA_AIRPORTS = {
+    "SAEZ": {"name": "Ezeiza", "lat": -34.8222, "lon": -58.5358},
+    "SABE": {"name": "Aeroparque", "lat": -34.5592, "lon": -58.4156},
+    "SACO": {"name": "Córdoba", "lat": -31.3233, "lon": -64.2080},
+    "SAZS": {"name": "San Carlos de Bariloche", "lat": -41.1512, "lon": -71.1575},
+    "SAZM": {"name": "Mendoza", "lat": -32.8317, "lon": -68.7929},
+    "SASA": {"name": "Salta", "lat": -24.8560, "lon": -65.4862},
+    "SARF": {"name": "Rosario", "lat": -32.9036, "lon": -60.7850},
+    "SAAV": {"name": "Ushuaia", "lat": -54.8433, "lon": -68.2958},
+}
+
+STATE_FILE = os.getenv("STATE_FILE", "plane_state.json")
+# Formato viejo del historial, se importa al log de eventos una sola vez
+HISTORY_FILE = "flight_history.json"
+
+# Intervalo máximo entre consultas sin aviones en vuelo (ver scheduler.py)
+POLL_INTERVAL = 300  # 5 minutos
+
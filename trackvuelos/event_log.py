@@ -0,0 +1,237 @@
+import json
+import os
+import re
+import threading
+
+from .atomic import _fsync_dir
+
+HISTORY_DIR = os.getenv("HISTORY_DIR", "flight_history")
+SEGMENT_MAX_BYTES = int(os.getenv("HISTORY_SEGMENT_MAX_BYTES", str(1024 * 1024)))
+# Al superar esta cantidad de segmentos sellados se fusionan los más nuevos
+MAX_SEALED_SEGMENTS = int(os.getenv("HISTORY_MAX_SEGMENTS", "16"))
+
+# events-000007.jsonl, o events-000003-000010.jsonl si fusiona del 3 al 10
+_SEGMENT_NAME = re.compile(r"^events-(\d{6})(?:-(\d{6}))?\.jsonl$")
+_READ_BLOCK = 64 * 1024
+
+
+class EventLog:
+    """Log de eventos append-only en segmentos JSON-lines.
+
+    Cada evento es una línea escrita con un único write + fsync. Cuando el
+    segmento activo supera `segment_max_bytes` se sella y se abre otro; si
+    hay más de `max_sealed_segments` sellados se fusionan con `compact()`.
+
+    Cada segmento es un rango de números (first, last): los fusionados se
+    llaman con el rango que cubren, así que nunca pisan a los que reemplazan.
+    """
+
+    def __init__(self, directory=HISTORY_DIR, segment_max_bytes=SEGMENT_MAX_BYTES,
+                 max_sealed_segments=MAX_SEALED_SEGMENTS):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.max_sealed_segments = max_sealed_segments
+        self._lock = threading.Lock()
+        self._fd = None
+        self._active = None
+
+    def _segment_path(self, segment):
+        first, last = segment
+        name = f"events-{first:06d}.jsonl" if first == last else f"events-{first:06d}-{last:06d}.jsonl"
+        return os.path.join(self.directory, name)
+
+    def _all_segments(self):
+        if not os.path.isdir(self.directory):
+            return []
+        segments = []
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_NAME.match(name)
+            if match:
+                first = int(match.group(1))
+                segments.append((first, int(match.group(2) or first)))
+        # Por inicio y, con el mismo inicio, el más amplio primero
+        return sorted(segments, key=lambda segment: (segment[0], -segment[1]))
+
+    def segments(self):
+        """Segmentos (first, last) existentes, del más viejo al más nuevo.
+
+        Los que quedan dentro del rango de uno fusionado (un corte entre
+        el reemplazo y el borrado) se ignoran: sus eventos ya están ahí.
+        """
+        segments = []
+        for segment in self._all_segments():
+            if not segments or segment[1] > segments[-1][1]:
+                segments.append(segment)
+        return segments
+
+    def _open_active(self):
+        if self._fd is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        segments = self.segments()
+        if not segments:
+            self._active = 1
+        elif segments[-1][0] == segments[-1][1]:
+            self._active = segments[-1][0]
+        else:
+            self._active = segments[-1][1] + 1
+        path = self._segment_path((self._active, self._active))
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+        # Si quedó una línea cortada, cerrarla para no pegarle el próximo evento
+        size = os.fstat(self._fd).st_size
+        if size:
+            with open(path, "rb") as f:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    os.write(self._fd, b"\n")
+
+    def _rotate(self):
+        os.close(self._fd)
+        self._active += 1
+        self._fd = os.open(self._segment_path((self._active, self._active)),
+                           os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if len(self.segments()) - 1 > self.max_sealed_segments:
+            self._compact()
+
+    def _write(self, data):
+        self._open_active()
+        os.write(self._fd, data)
+        os.fsync(self._fd)
+        if os.fstat(self._fd).st_size >= self.segment_max_bytes:
+            self._rotate()
+
+    def append(self, event):
+        line = json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._write(line.encode("utf-8"))
+
+    def extend(self, events):
+        """Agrega varios eventos en un solo write (usado para importar)."""
+        data = "".join(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n"
+                       for event in events)
+        if data:
+            with self._lock:
+                self._write(data.encode("utf-8"))
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def is_empty(self):
+        return all(os.path.getsize(self._segment_path(segment)) == 0 for segment in self.segments())
+
+    def iter_events(self):
+        """Todos los eventos, del más viejo al más nuevo."""
+        for segment in self.segments():
+            with open(self._segment_path(segment), "rb") as f:
+                for line in f:
+                    event = _decode(line)
+                    if event is not None:
+                        yield event
+
+    def iter_reversed(self):
+        """Todos los eventos, del más nuevo al más viejo, leyendo desde el final."""
+        for segment in reversed(self.segments()):
+            for line in _read_lines_reversed(self._segment_path(segment)):
+                event = _decode(line)
+                if event is not None:
+                    yield event
+
+    def tail(self, limit=100):
+        events = []
+        for event in self.iter_reversed():
+            events.append(event)
+            if len(events) >= limit:
+                break
+        return events
+
+    def compact(self):
+        """Fusiona los segmentos sellados más nuevos en uno, descartando líneas corruptas."""
+        with self._lock:
+            self._open_active()
+            return self._compact()
+
+    def _compact(self):
+        sealed = [segment for segment in self.segments() if segment[1] < self._active]
+        if len(sealed) < 2:
+            return 0
+
+        # Los dos más nuevos y, hacia atrás, los que no sean más grandes que
+        # lo ya juntado: cada evento se reescribe O(log n) veces, no en cada
+        # compactación
+        sizes = [os.path.getsize(self._segment_path(segment)) for segment in sealed]
+        start = len(sealed) - 2
+        total = sizes[-1] + sizes[-2]
+        while start > 0 and sizes[start - 1] <= total:
+            start -= 1
+            total += sizes[start]
+        merged = sealed[start:]
+
+        target = self._segment_path((merged[0][0], merged[-1][1]))
+        tmp_path = target + ".tmp"
+        with open(tmp_path, "wb") as out:
+            for segment in merged:
+                with open(self._segment_path(segment), "rb") as f:
+                    for line in f:
+                        if _decode(line) is not None:
+                            out.write(line if line.endswith(b"\n") else line + b"\n")
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, target)
+        _fsync_dir(self.directory)
+        # Un corte acá deja los originales, que segments() ya ignora; se
+        # borran en la próxima compactación
+        self._remove_covered()
+        return len(merged) - 1
+
+    def _remove_covered(self):
+        covering = None
+        for segment in self._all_segments():
+            if covering is not None and segment[1] <= covering[1]:
+                os.remove(self._segment_path(segment))
+            else:
+                covering = segment
+
+    def import_legacy(self, path):
+        """Importa el flight_history.json viejo (más nuevo primero) si el log está vacío."""
+        if not os.path.exists(path) or not self.is_empty():
+            return 0
+        try:
+            with open(path, "r") as f:
+                history = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        self.extend(reversed(history))
+        return len(history)
+
+
+def _decode(line):
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        # Línea cortada por un corte de luz a mitad de write
+        return None
+
+
+def _read_lines_reversed(path):
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+        while position > 0:
+            size = min(_READ_BLOCK, position)
+            position -= size
+            f.seek(position)
+            block = f.read(size) + remainder
+            lines = block.split(b"\n")
+            remainder = lines[0]
+            for line in reversed(lines[1:]):
+                yield line
+        if remainder:
+            yield remainder
@@ -0,0 +1,171 @@
+import csv
+import json
+import logging
+import os
+import re
+import threading
+import time
+from types import MappingProxyType
+
+from .config import PLANES
+
+# CSV (columnas icao24/hex y registration/reg) o JSON ({hex: matrícula} o
+# lista de objetos); vacío = se usa PLANES de config.py
+FLEET_FILE = os.getenv("FLEET_FILE", "")
+# Cada cuántos segundos se mira si el archivo cambió
+FLEET_RELOAD_INTERVAL = float(os.getenv("FLEET_RELOAD_INTERVAL", "5"))
+
+logger = logging.getLogger(__name__)
+
+_HEX = re.compile(r"~?[0-9a-f]{6}")
+_HEX_COLUMNS = ("icao24", "hex", "icao")
+_REGISTRATION_COLUMNS = ("registration", "reg", "matricula")
+
+
+class Fleet:
+    """Flota inmutable: hex -> matrícula y los sets para filtrar en O(1).
+
+    `wanted` son los hex en bytes, listos para opensky.iter_states.
+    """
+
+    def __init__(self, planes, source=None):
+        self.planes = MappingProxyType(dict(planes))
+        self.hexes = frozenset(self.planes)
+        self.wanted = frozenset(icao24.encode() for icao24 in self.hexes)
+        self.source = source
+
+    def __len__(self):
+        return len(self.planes)
+
+    def __contains__(self, icao24):
+        return icao24 in self.hexes
+
+    def __getitem__(self, icao24):
+        return self.planes[icao24]
+
+    def get(self, icao24, default=None):
+        return self.planes.get(icao24, default)
+
+    def items(self):
+        return self.planes.items()
+
+    def registrations(self):
+        return list(self.planes.values())
+
+
+def _normalize_hex(value):
+    icao24 = str(value or "").strip().lower()
+    return icao24 if _HEX.fullmatch(icao24) else None
+
+
+def _pick(row, columns):
+    for column in columns:
+        value = row.get(column)
+        if value:
+            return str(value).strip()
+    return None
+
+
+def _parse_csv(f):
+    reader = csv.DictReader(f)
+    for row in reader:
+        row = {(key or "").strip().lower(): value for key, value in row.items()}
+        yield _pick(row, _HEX_COLUMNS), _pick(row, _REGISTRATION_COLUMNS)
+
+
+def _parse_json(f):
+    data = json.load(f)
+    if isinstance(data, dict):
+        return data.items()
+    return ((_pick(entry, _HEX_COLUMNS), _pick(entry, _REGISTRATION_COLUMNS))
+            for entry in data if isinstance(entry, dict))
+
+
+def parse_fleet(path):
+    """Lee un registro de flota y devuelve {hex: matrícula}.
+
+    Las filas con hex inválido se descartan; si falta la matrícula se usa
+    el hex en mayúscula.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if path.lower().endswith(".json"):
+            entries = _parse_json(f)
+        else:
+            entries = _parse_csv(f)
+
+        planes = {}
+        skipped = 0
+        for icao24, registration in entries:
+            icao24 = _normalize_hex(icao24)
+            if icao24 is None:
+                skipped += 1
+                continue
+            planes[icao24] = str(registration).strip() if registration else icao24.upper()
+
+    if skipped:
+        logger.warning("Flota %s: %d filas sin icao24 válido", path, skipped)
+    return planes
+
+
+def load_fleet(path=FLEET_FILE):
+    """Carga única, sin recarga: para el handler serverless."""
+    if path:
+        return Fleet(parse_fleet(path), path)
+    return Fleet(PLANES, "config")
+
+
+class FleetRegistry:
+    """Flota recargable: current() devuelve la versión vigente y, como mucho
+    cada `check_interval` segundos, mira el mtime del archivo y la relee si
+    cambió. Si la relectura falla se sigue con la flota anterior."""
+
+    def __init__(self, path=FLEET_FILE, default=None, check_interval=FLEET_RELOAD_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._default = Fleet(PLANES if default is None else default, "config")
+        self._lock = threading.Lock()
+        self._fleet = None
+        self._stamp = None
+        self._next_check = 0.0
+
+    def current(self):
+        if not self.path:
+            return self._default
+
+        fleet = self._fleet
+        if fleet is not None and time.monotonic() < self._next_check:
+            return fleet
+
+        with self._lock:
+            if self._fleet is None or time.monotonic() >= self._next_check:
+                self._next_check = time.monotonic() + self.check_interval
+                self._reload_if_changed()
+            return self._fleet
+
+    def reload(self):
+        """Fuerza la relectura del archivo."""
+        with self._lock:
+            self._stamp = None
+            self._reload_if_changed()
+            return self._fleet
+
+    def _reload_if_changed(self):
+        try:
+            st = os.stat(self.path)
+            stamp = (st.st_mtime_ns, st.st_size)
+            if stamp == self._stamp:
+                return
+            fleet = Fleet(parse_fleet(self.path), self.path)
+        except (OSError, ValueError, csv.Error) as e:
+            logger.error("Error cargando flota %s: %s", self.path, e)
+            if self._fleet is None:
+                self._fleet = self._default
+            return
+
+        previous = self._fleet
+        self._fleet = fleet
+        self._stamp = stamp
+        if previous is not None:
+            logger.info("Flota recargada desde %s: %d aviones (antes %d)", self.path, len(fleet), len(previous))
+        else:
+            logger.info("Flota cargada desde %s: %d aviones", self.path, len(fleet))
@@ -0,0 +1,172 @@
+"""Fase de vuelo de cada avión, para detectar despegues y aterrizajes.
+
+Un avión que falta en una consulta no aterrizó: puede ser un hueco de
+cobertura o una fuente que no respondió. Cada avión tiene una máquina de
+estados que se actualiza en O(1) con cada observación:
+
+    ground/taxi --(en el aire)--> climb/cruise/descent   despegue
+    climb/cruise/descent --(falta)--> lost
+    lost --(vuelve a aparecer)--> climb/cruise/descent   sin aviso
+    en el aire/lost --(LANDING_GROUND_DEBOUNCE veces en tierra)--> landed
+    lost --(sin datos por LANDING_LOST_TIMEOUT)--> landed
+
+Si se perdió en aproximación (bajando, bajo y cerca de un aeropuerto) o
+después de verse en tierra, el plazo es LANDING_APPROACH_TIMEOUT: es lo
+normal cuando las antenas dejan de verlo antes de tocar tierra o apaga el
+transpondedor al rato.
+"""
+import os
+import threading
+
+GROUND, TAXI, CLIMB, CRUISE, DESCENT, LOST, LANDED = (
+    "ground", "taxi", "climb", "cruise", "descent", "lost", "landed"
+)
+AIRBORNE = frozenset((CLIMB, CRUISE, DESCENT))
+# Fases que cuentan como "en vuelo" (aviones activos)
+IN_FLIGHT = AIRBORNE | {LOST}
+
+# Observaciones seguidas en tierra para dar por aterrizado a un avión en vuelo
+LANDING_GROUND_DEBOUNCE = int(os.getenv("LANDING_GROUND_DEBOUNCE", "2"))
+# Segundos sin datos tras los que un avión perdido se da por aterrizado
+LANDING_LOST_TIMEOUT = float(os.getenv("LANDING_LOST_TIMEOUT", "1200"))
+LANDING_APPROACH_TIMEOUT = float(os.getenv("LANDING_APPROACH_TIMEOUT", "90"))
+# Aproximación: por debajo de esta altitud (m) y a menos de LANDING_AIRPORT_KM
+LANDING_APPROACH_ALTITUDE = float(os.getenv("LANDING_APPROACH_ALTITUDE", "1500"))
+LANDING_AIRPORT_KM = float(os.getenv("LANDING_AIRPORT_KM", "15"))
+# Régimen vertical (ft/min) que separa subida y descenso de crucero
+PHASE_VERTICAL_FPM = float(os.getenv("PHASE_VERTICAL_FPM", "300"))
+# En tierra, por encima de esta velocidad (km/h) está carreteando
+PHASE_TAXI_KMH = float(os.getenv("PHASE_TAXI_KMH", "10"))
+
+TAKEOFF, LANDING = "takeoff", "landing"
+
+
+class Aircraft:
+    """Estado de un avión: fase y lo último que se vio de él."""
+
+    __slots__ = ("phase", "last_seen", "altitude", "baro_rate", "lat", "lon", "ground_hits", "approach")
+
+    def __init__(self, phase, last_seen):
+        self.phase = phase
+        self.last_seen = last_seen
+        self.altitude = None
+        self.baro_rate = None
+        self.lat = None
+        self.lon = None
+        self.ground_hits = 0
+        self.approach = False
+
+
+def observed_phase(observation):
+    """Fase que indica una sola observación."""
+    if observation.on_ground:
+        velocity = observation.velocity
+        return TAXI if velocity is not None and velocity > PHASE_TAXI_KMH else GROUND
+    baro_rate = observation.baro_rate
+    if baro_rate is not None and baro_rate >= PHASE_VERTICAL_FPM:
+        return CLIMB
+    if baro_rate is not None and baro_rate <= -PHASE_VERTICAL_FPM:
+        return DESCENT
+    return CRUISE
+
+
+class FlightPhases:
+    """Máquina de estados por matrícula.
+
+    observe() y missing() devuelven TAKEOFF, LANDING o None. `near_airport(lat,
+    lon)` dice si una posición está a menos de LANDING_AIRPORT_KM de un
+    aeropuerto; solo se consulta cuando se pierde un avión bajo y bajando.
+    """
+
+    def __init__(self, near_airport=None, ground_debounce=LANDING_GROUND_DEBOUNCE,
+                 lost_timeout=LANDING_LOST_TIMEOUT, approach_timeout=LANDING_APPROACH_TIMEOUT):
+        self.near_airport = near_airport
+        self.ground_debounce = ground_debounce
+        self.lost_timeout = lost_timeout
+        self.approach_timeout = approach_timeout
+        self._lock = threading.Lock()
+        self._aircraft = {}
+
+    def restore(self, registrations, now):
+        """Aviones que estaban en vuelo al reiniciar: perdidos desde `now`."""
+        with self._lock:
+            for registration in registrations:
+                self._aircraft.setdefault(registration, Aircraft(LOST, now))
+
+    def phase(self, registration):
+        with self._lock:
+            aircraft = self._aircraft.get(registration)
+            return aircraft.phase if aircraft is not None else None
+
+    def observe(self, registration, observation, now):
+        seen = observation.contact_time
+        seen = now if seen is None else min(seen, now)
+        phase = observed_phase(observation)
+        with self._lock:
+            aircraft = self._aircraft.get(registration)
+            if aircraft is None:
+                aircraft = self._aircraft[registration] = Aircraft(GROUND, seen)
+            previous = aircraft.phase
+            aircraft.last_seen = seen
+            if observation.lat is not None:
+                aircraft.lat, aircraft.lon = observation.lat, observation.lon
+            aircraft.altitude = observation.altitude
+            aircraft.baro_rate = observation.baro_rate
+            aircraft.approach = False
+
+            if phase in AIRBORNE:
+                aircraft.ground_hits = 0
+                aircraft.phase = phase
+                return TAKEOFF if previous not in IN_FLIGHT else None
+
+            if previous not in IN_FLIGHT:
+                aircraft.phase = phase
+                return None
+            # En tierra tras estar en vuelo: se confirma con varias observaciones
+            aircraft.ground_hits += 1
+            aircraft.approach = True
+            if aircraft.ground_hits < self.ground_debounce:
+                return None
+            aircraft.ground_hits = 0
+            aircraft.phase = LANDED
+            return LANDING
+
+    def missing(self, registration, now):
+        """El avión no apareció en una consulta que lo incluía."""
+        with self._lock:
+            aircraft = self._aircraft.get(registration)
+            if aircraft is None:
+                # Sin historia (no debería pasar): se lo toma como recién perdido
+                self._aircraft[registration] = Aircraft(LOST, now)
+                return None
+            if aircraft.phase not in IN_FLIGHT:
+                return None
+            if aircraft.phase != LOST:
+                aircraft.phase = LOST
+                aircraft.approach = self._on_approach(aircraft)
+            timeout = self.approach_timeout if aircraft.approach else self.lost_timeout
+            if now - aircraft.last_seen < timeout:
+                return None
+            aircraft.phase = LANDED
+            aircraft.ground_hits = 0
+            return LANDING
+
+    def _on_approach(self, aircraft):
+        # Ya reportó estar en tierra (OpenSky no manda altitud en tierra)
+        if aircraft.ground_hits:
+            return True
+        if aircraft.altitude is None or aircraft.altitude > LANDING_APPROACH_ALTITUDE:
+            return False
+        if aircraft.baro_rate is not None and aircraft.baro_rate > -PHASE_VERTICAL_FPM:
+            return False
+        if aircraft.lat is None or self.near_airport is None:
+            return False
+        return self.near_airport(aircraft.lat, aircraft.lon)
+
+    def stats(self):
+        """Cantidad de aviones en cada fase."""
+        counts = {}
+        with self._lock:
+            for aircraft in self._aircraft.values():
+                counts[aircraft.phase] = counts.get(aircraft.phase, 0) + 1
+        return counts
@@ -0,0 +1,199 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from .config import ARGENTINA_TZ
+
+FLIGHT_DB = os.getenv("FLIGHT_DB", "flights.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    registration TEXT NOT NULL,
+    type TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    ts REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_registration_ts ON events (registration, ts);
+CREATE INDEX IF NOT EXISTS idx_events_type_ts ON events (type, ts);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts);
+
+CREATE TABLE IF NOT EXISTS positions (
+    id INTEGER PRIMARY KEY,
+    registration TEXT NOT NULL,
+    ts REAL NOT NULL,
+    lat REAL,
+    lon REAL,
+    altitude REAL,
+    velocity REAL,
+    heading REAL,
+    baro_rate REAL,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_positions_registration_ts ON positions (registration, ts);
+
+CREATE TABLE IF NOT EXISTS tracks (
+    id INTEGER PRIMARY KEY,
+    registration TEXT NOT NULL,
+    started_ts REAL NOT NULL,
+    ended_ts REAL NOT NULL,
+    points INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tracks_registration_ended ON tracks (registration, ended_ts);
+"""
+
+
+def parse_timestamp(value):
+    """Acepta epoch en segundos o ISO 8601; devuelve epoch o None.
+
+    Las fechas sin zona horaria (historial viejo) se toman como hora argentina.
+    """
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=ARGENTINA_TZ)
+    return parsed.timestamp()
+
+
+class FlightStore:
+    """Eventos y posiciones en SQLite (modo WAL), una conexión por thread."""
+
+    def __init__(self, path=FLIGHT_DB):
+        self.path = path
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.executescript(SCHEMA)
+                    self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def is_empty(self):
+        return self._conn().execute("SELECT 1 FROM events LIMIT 1").fetchone() is None
+
+    def add_event(self, event):
+        self.add_events([event])
+
+    def add_events(self, events):
+        rows = [
+            (event["callsign"], event["type"], event["timestamp"],
+             parse_timestamp(event["timestamp"]), json.dumps(event.get("data") or {}))
+            for event in events
+        ]
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO events (registration, type, timestamp, ts, data) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def add_positions(self, planes_info, ts):
+        rows = [
+            (plane.registration, ts, plane.lat, plane.lon, plane.altitude, plane.velocity,
+             plane.heading, plane.baro_rate, plane.source)
+            for plane in planes_info
+        ]
+        if not rows:
+            return
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO positions (registration, ts, lat, lon, altitude, velocity, heading, baro_rate, source)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def add_track(self, registration, track):
+        """Guarda un track.TrackBuffer ya simplificado, codificado por diferencias."""
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO tracks (registration, started_ts, ended_ts, points, data) VALUES (?, ?, ?, ?, ?)",
+                (registration, track.ts[0], track.ts[-1], len(track), track.encode()),
+            )
+
+    def last_track(self, registration):
+        """Último track guardado de la matrícula como (started_ts, ended_ts, blob), o None."""
+        row = self._conn().execute(
+            "SELECT started_ts, ended_ts, data FROM tracks WHERE registration = ?"
+            " ORDER BY ended_ts DESC LIMIT 1",
+            (registration,),
+        ).fetchone()
+        return (row["started_ts"], row["ended_ts"], row["data"]) if row else None
+
+    def query_events(self, registration=None, event_type=None, since=None, until=None, limit=50):
+        """Eventos más nuevos primero en [since, until).
+
+        Para paginar se pasa como `until` el timestamp del último evento de
+        la página anterior, así cada consulta recorre solo las filas que devuelve.
+        """
+        clauses = []
+        params = []
+        if registration:
+            clauses.append("registration = ?")
+            params.append(registration)
+        if event_type:
+            clauses.append("type = ?")
+            params.append(event_type)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+        rows = self._conn().execute(
+            f"SELECT id, registration, type, timestamp, data FROM events {where}"
+            " ORDER BY ts DESC LIMIT ?",
+            params,
+        ).fetchall()
+
+        return [{
+            "id": row["id"],
+            "callsign": row["registration"],
+            "type": row["type"],
+            "timestamp": row["timestamp"],
+            "data": json.loads(row["data"]),
+        } for row in rows]
+
+    def query_positions(self, registration, since=None, until=None, limit=1000):
+        """Las últimas `limit` posiciones en [since, until), de la más vieja a la más nueva."""
+        clauses = ["registration = ?"]
+        params = [registration]
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        params.append(limit)
+        rows = self._conn().execute(
+            f"SELECT ts, lat, lon, altitude, velocity, heading, baro_rate, source FROM positions"
+            f" WHERE {' AND '.join(clauses)} ORDER BY ts DESC LIMIT ?",
+            params,
+        ).fetchall()
+        return [dict(row) for row in reversed(rows)]
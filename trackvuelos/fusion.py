@@ -0,0 +1,264 @@
+"""Fusión de OpenSky y ADSB.one.
+
+Las dos fuentes se consultan a la vez (la demora del tick es la de la más
+lenta, no la suma) y, para cada avión que ven las dos, cada dato se toma de
+la que lo reportó más recientemente: la posición según `position_time` y el
+resto según `contact_time`. Un Scoreboard lleva la latencia y
+disponibilidad de cada fuente; la primaria (la más rápida de las
+disponibles) desempata cuando los tiempos son iguales o faltan.
+
+Cada fuente tiene su CircuitBreaker (ver breaker) y las consultas son
+hedged: una vez que alguna fuente respondió, las que pasaron su p95 se
+abandonan y el tick sigue con lo que ya llegó. La consulta abandonada
+termina en segundo plano y solo se anota en el scoreboard y el breaker.
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from . import metrics
+from .breaker import CircuitBreaker
+
+# Consultas recientes por fuente que cuentan para latencia y disponibilidad
+FUSION_WINDOW = int(os.getenv("FUSION_WINDOW", "50"))
+# Fracción de consultas exitosas por debajo de la cual una fuente no puede ser primaria
+FUSION_MIN_AVAILABILITY = float(os.getenv("FUSION_MIN_AVAILABILITY", "0.5"))
+# Percentil de la latencia de cada fuente a partir del cual se deja de esperarla
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+# Espera mínima antes de abandonar una fuente, para no cortar por ruido
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.25"))
+# Consultas exitosas necesarias antes de aplicar el hedge a una fuente
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "5"))
+
+# Campos que se toman de la observación con el último mensaje más reciente
+_CONTACT_FIELDS = ("altitude", "velocity", "heading", "baro_rate")
+
+logger = logging.getLogger(__name__)
+
+source_availability = metrics.Gauge(
+    "trackvuelos_source_availability",
+    "Fracción de consultas exitosas en la ventana del scoreboard",
+    ["source"],
+)
+hedged_requests = metrics.Counter(
+    "trackvuelos_hedged_total",
+    "Consultas abandonadas porque otra fuente respondió antes y pasaron su p95",
+    ["source"],
+)
+
+
+class Scoreboard:
+    """Latencia y disponibilidad de las últimas `window` consultas de cada fuente."""
+
+    def __init__(self, window=FUSION_WINDOW, min_availability=FUSION_MIN_AVAILABILITY):
+        self.window = window
+        self.min_availability = min_availability
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def record(self, source, latency, ok, units=1):
+        """`units`: tamaño del lote de la consulta (ver unit_latency)."""
+        with self._lock:
+            samples = self._samples.get(source)
+            if samples is None:
+                samples = self._samples[source] = deque(maxlen=self.window)
+            samples.append((latency, ok, max(1, units)))
+            availability = sum(sample_ok for _, sample_ok, _ in samples) / len(samples)
+        source_availability.set(round(availability, 3), source)
+
+    def availability(self, source):
+        with self._lock:
+            samples = list(self._samples.get(source, ()))
+        if not samples:
+            return None
+        return sum(ok for _, ok, _ in samples) / len(samples)
+
+    def latency(self, source, fraction=0.5):
+        """Percentil de la latencia (segundos) de las consultas exitosas, o None."""
+        with self._lock:
+            latencies = [latency for latency, ok, _ in self._samples.get(source, ()) if ok]
+        return metrics.percentile(latencies, fraction) if latencies else None
+
+    def unit_latency(self, source, fraction=0.5, min_samples=1):
+        """Como latency() pero por unidad del lote, para comparar consultas de
+        ADSB.one con distinta cantidad de aviones."""
+        with self._lock:
+            latencies = [latency / units for latency, ok, units in self._samples.get(source, ()) if ok]
+        return metrics.percentile(latencies, fraction) if len(latencies) >= max(1, min_samples) else None
+
+    def primary(self, sources):
+        """La fuente disponible más rápida; sin datos, la primera de `sources`."""
+        best, best_latency = None, None
+        for source in sources:
+            availability = self.availability(source)
+            latency = self.latency(source)
+            if availability is None or latency is None or availability < self.min_availability:
+                continue
+            if best_latency is None or latency < best_latency:
+                best, best_latency = source, latency
+        return best or next(iter(sources), None)
+
+    def stats(self):
+        with self._lock:
+            sources = list(self._samples)
+        stats = {}
+        for source in sources:
+            p50, p95 = self.latency(source), self.latency(source, 0.95)
+            stats[source] = {
+                "availability": round(self.availability(source), 3),
+                "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            }
+        return stats
+
+
+def _fresher(a, b, field):
+    """La observación con el tiempo `field` más reciente; `a` si empatan o faltan."""
+    a_time, b_time = getattr(a, field), getattr(b, field)
+    if b_time is not None and (a_time is None or b_time > a_time):
+        return b
+    return a
+
+
+def merge(primary, secondary):
+    """Una sola observación con el dato más fresco de cada campo.
+
+    `primary` gana los empates y aporta los datos que la otra no tiene.
+    """
+    contact = _fresher(primary, secondary, "contact_time")
+    stale = secondary if contact is primary else primary
+    if primary.lat is None or secondary.lat is None:
+        position = primary if secondary.lat is None else secondary
+    else:
+        position = _fresher(primary, secondary, "position_time")
+
+    fields = {field: getattr(contact, field) if getattr(contact, field) is not None else getattr(stale, field)
+              for field in _CONTACT_FIELDS}
+    sources = [primary.source, secondary.source]
+    if contact is secondary and position is secondary:
+        sources.reverse()
+    return primary.replace(
+        callsign=primary.callsign or secondary.callsign,
+        country=primary.country or secondary.country,
+        lat=position.lat,
+        lon=position.lon,
+        squawk=primary.squawk or secondary.squawk,
+        on_ground=contact.on_ground,
+        position_time=position.position_time,
+        contact_time=contact.contact_time,
+        source="+".join(sources),
+        **fields,
+    )
+
+
+class FusionEngine:
+    """Consulta las fuentes en paralelo y fusiona lo que devuelven."""
+
+    def __init__(self, scoreboard=None, hedge_percentile=HEDGE_PERCENTILE, hedge_min_delay=HEDGE_MIN_DELAY):
+        self.scoreboard = scoreboard or Scoreboard()
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.breakers = {}
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="fusion")
+
+    def breaker(self, source):
+        with self._lock:
+            breaker = self.breakers.get(source)
+            if breaker is None:
+                breaker = self.breakers[source] = CircuitBreaker(source)
+            return breaker
+
+    def _run(self, source, fetch, units):
+        started = time.perf_counter()
+        try:
+            result, error = fetch(), None
+        except Exception as e:
+            result, error = {}, e
+        elapsed = time.perf_counter() - started
+        self.scoreboard.record(source, elapsed, error is None, units)
+        self.breaker(source).record(elapsed, error is None, units)
+        metrics.span_seconds.observe(elapsed, f"source_{source}")
+        if error is not None:
+            logger.warning("%s no respondió: %s", source, error, extra={"source": source})
+        return result, error is None
+
+    def _budget(self, source, units):
+        """Segundos que se espera a la fuente una vez que otra respondió (None = sin límite)."""
+        latency = self.scoreboard.unit_latency(source, self.hedge_percentile, HEDGE_MIN_SAMPLES)
+        return None if latency is None else max(self.hedge_min_delay, latency * max(1, units))
+
+    def _start(self, source, fetch, units):
+        """Lanza la consulta, o None si el circuito está abierto o sigue la anterior."""
+        with self._lock:
+            running = self._inflight.get(source)
+        if running is not None and not running.done():
+            logger.info("%s sigue con la consulta anterior; se saltea", source, extra={"source": source})
+            return None
+        if not self.breaker(source).allow():
+            logger.debug("%s: circuito abierto", source, extra={"source": source})
+            return None
+        future = self._executor.submit(contextvars.copy_context().run, self._run, source, fetch, units)
+        with self._lock:
+            self._inflight[source] = future
+        return future
+
+    def fetch(self, sources):
+        """`sources`: {fuente: (función sin argumentos que devuelve {icao24:
+        Observation}, unidades del lote)}.
+
+        Devuelve (observaciones fusionadas por icao24, {fuente que
+        respondió: icao24 que vio}). Una fuente que falla, tiene el circuito
+        abierto o se abandona por el hedge solo deja de aportar.
+        """
+        primary = self.scoreboard.primary(sources)
+        started = time.monotonic()
+        deadlines = {}
+        futures = {}
+        for source in sorted(sources, key=lambda source: source != primary):
+            fetch, units = sources[source]
+            future = self._start(source, fetch, units)
+            if future is not None:
+                futures[future] = source
+                budget = self._budget(source, units)
+                deadlines[future] = None if budget is None else started + budget
+
+        results = {}
+        pending = set(futures)
+        while pending:
+            # Ya con datos, a las fuentes pendientes se las espera hasta su p95
+            limit = None
+            if results and all(deadlines[future] is not None for future in pending):
+                limit = max(deadlines[future] for future in pending)
+                if time.monotonic() >= limit:
+                    for future in pending:
+                        hedged_requests.inc(futures[future])
+                        logger.info("%s no respondió en su p95; se sigue con %s", futures[future],
+                                    ", ".join(results), extra={"source": futures[future]})
+                    break
+            timeout = None if limit is None else limit - time.monotonic()
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                observations, ok = future.result()
+                if ok:
+                    results[futures[future]] = observations
+
+        merged = {}
+        for source in sorted(results, key=lambda source: source != primary):
+            for icao24, observation in results[source].items():
+                current = merged.get(icao24)
+                merged[icao24] = observation if current is None else merge(current, observation)
+        return merged, {source: frozenset(observations) for source, observations in results.items()}
+
+    def stats(self):
+        sources = self.scoreboard.stats()
+        with self._lock:
+            breakers = dict(self.breakers)
+        for source, breaker in breakers.items():
+            sources.setdefault(source, {})["breaker"] = breaker.stats()
+        return {"primary": self.scoreboard.primary(sources), "sources": sources}
@@ -0,0 +1,156 @@
+"""Logging estructurado para los puntos de entrada.
+
+Los módulos del paquete solo hacen logging.getLogger(__name__); setup()
+cuelga de "trackvuelos" un QueueHandler y escribe desde un QueueListener,
+así el thread del monitor nunca espera a stdout. Cada verificación abre un
+tick con new_tick() y todas sus líneas (incluidas las de los workers de
+ADSB.one) llevan el mismo `tick`, que también aparece en el resumen con la
+duración que se registra en /metrics.
+"""
+import atexit
+import contextvars
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+
+# json (una línea por evento) o text (legible en la terminal)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Niveles por subsistema: "opensky=DEBUG,adsb_one=WARNING"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+# Fracción de las filas de OpenSky que se loguean en DEBUG
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+
+ROOT_LOGGER = "trackvuelos"
+
+tick_id = contextvars.ContextVar("tick_id", default=None)
+_tick_counter = itertools.count(1)
+_listener = None
+
+# Atributos propios de LogRecord; lo demás vino en `extra`
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "tick"}
+
+
+def new_tick():
+    """Abre un tick en el contexto actual y devuelve su id."""
+    value = f"{int(time.time()):x}-{next(_tick_counter)}"
+    tick_id.set(value)
+    return value
+
+
+def run_in_context(executor, fn, items):
+    """executor.map que conserva el tick en los workers."""
+    futures = [executor.submit(contextvars.copy_context().run, fn, item) for item in items]
+    return [future.result() for future in futures]
+
+
+class Sampler:
+    """Deja pasar una de cada 1/rate llamadas; sin azar, para no pagar random()."""
+
+    def __init__(self, rate=LOG_SAMPLE_RATE):
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._count = itertools.count()
+
+    def __call__(self):
+        return bool(self.every) and next(self._count) % self.every == 0
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Se arma el mensaje acá (los args pueden cambiar después) pero el
+        # formato final lo hace el listener; los campos de `extra` se conservan
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _TickFilter(logging.Filter):
+    # Corre en el thread que loguea, antes de encolar: ahí el contextvar es válido
+    def filter(self, record):
+        record.tick = tick_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "tick", None):
+            entry["tick"] = record.tick
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s%(tick_label)s %(message)s", "%Y-%m-%d %H:%M:%S")
+
+    def format(self, record):
+        tick = getattr(record, "tick", None)
+        record.tick_label = f" [{tick}]" if tick else ""
+        return super().format(record)
+
+
+def _parse_levels(spec):
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            name = name.strip()
+            if not name.startswith(ROOT_LOGGER):
+                name = f"{ROOT_LOGGER}.{name}"
+            levels[name] = level.strip().upper()
+    return levels
+
+
+def setup(use_queue=True, stream=None):
+    """Configura el logging de trackvuelos (una sola vez).
+
+    Con `use_queue=False` se escribe en el momento: para el handler
+    serverless, donde un thread de fondo puede congelarse antes de vaciar
+    la cola.
+    """
+    global _listener
+    logger = logging.getLogger(ROOT_LOGGER)
+    if getattr(logger, "_trackvuelos_configured", False):
+        return logger
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+
+    if use_queue:
+        handler = _QueueHandler(queue.SimpleQueue())
+        _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+    else:
+        handler = output
+    handler.addFilter(_TickFilter())
+
+    logger.addHandler(handler)
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+    for name, level in _parse_levels(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+    logger._trackvuelos_configured = True
+    return logger
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+
+def calculate_eta(distance_km, speed_kmh):
+    if speed_kmh is not None and speed_kmh > 0:
+        hours = distance_km / speed_kmh
+        minutes = int(hours * 60)
+        return f"{minutes} min"
+    return None
+
+def get_cardinal_direction(heading):
+    if heading is None:
+        return ""
+    directions = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
+    idx = int((heading + 22.5) / 45) % 8
+    return directions[idx]
+
+def get_vertical_status(baro_rate):
+    if baro_rate is None:
+        return ""
+    if baro_rate > 64:
+        return f"⬆️ Subiendo +{baro_rate} ft/min"
+    elif baro_rate < -64:
+        return f"⬇️ Descendiendo {baro_rate} ft/min"
+    else:
+        return "➡️ Altitud estable"
+
+def check_emergency(squawk):
+    if squawk == "7700":
+        return "🆘 EMERGENCIA"
+    elif squawk == "7600":
+        return "📻 Falla de radio"
+    elif squawk == "7500":
+        return "🚨 HIJACK"
+    return None
+
+def _value(value):
+    return "N/A" if value is None else value
+
+def takeoff_message(observation, nearest, destination, in_progress=False):
+    registration = observation.registration
+    # Las fuentes ya vienen normalizadas a metros (ver observation)
+    altitude_unit = "m"
+    velocity_unit = "km/h"
+
+    event_icon = "🔄" if in_progress else "✈️"
+    event_type = "en curso" if in_progress else "despegó"
+
+    msg = f"{event_icon} {registration} {event_type}\n"
+    msg += f"ICAO24: {observation.icao24}\n"
+
+    emergency = check_emergency(observation.squawk)
+    if emergency:
+        msg += f"{emergency}\n"
+
+    msg += f"\n📊 Altitud: {_value(observation.altitude)} {altitude_unit}\n"
+    msg += f"🚀 Velocidad: {_value(observation.velocity)} {velocity_unit}\n"
+
+    heading = observation.heading
+    if heading is not None:
+        cardinal = get_cardinal_direction(heading)
+        msg += f"🧭 Rumbo: {int(heading)}° ({cardinal})\n"
+
+    vertical = get_vertical_status(observation.baro_rate)
+    if vertical:
+        msg += f"{vertical}\n"
+
+    if nearest:
+        msg += f"\n📍 Aeropuerto más cercano: {nearest['name']} ({nearest['code']})\n"
+        msg += f"📏 Distancia: {nearest['distance']} km\n"
+
+        eta = calculate_eta(nearest['distance'], observation.velocity)
+        if eta:
+            msg += f"⏱️ ETA aproximado: {eta}\n"
+
+    if destination and destination['name'] != (nearest['name'] if nearest else None):
+        msg += f"🎯 Dirección estimada: Hacia {destination['name']} ({destination['distance']} km)\n"
+
+    msg += f"\n🔗 Ver en vivo: https://www.flightradar24.com/{registration}\n"
+    msg += f"\n📡 Fuente: {observation.source}\n"
+    msg += f"🕐 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    return msg
+
+def landing_message(registration):
+    return (f"🛬 {registration} aterrizó\n"
+            f"🕐 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+def summary_message(planes_info):
+    msg = f"✈️ Aviones en vuelo ({len(planes_info)}):\n\n"
+    for plane in planes_info:
+        msg += (f"{plane.registration}: {_value(plane.altitude)}m, "
+               f"{_value(plane.velocity)}km/h, {_value(plane.country)}\n")
+    msg += f"\nFecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    return msg
+
+def fleet_summary(registrations, limit=20):
+    """Matrículas separadas por coma, recortadas para flotas grandes."""
+    registrations = list(registrations)
+    text = ", ".join(registrations[:limit])
+    if len(registrations) > limit:
+        text += f" y {len(registrations) - limit} más"
+    return text
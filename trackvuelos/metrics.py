@@ -0,0 +1,198 @@
+"""Métricas del proceso en formato de texto de Prometheus, sin dependencias.
+
+Los módulos registran sus métricas al importarse y las actualizan en el
+camino caliente; app.py las expone en /metrics con render(). Todo vive en
+memoria del proceso, así que en Vercel no tiene sentido exponerlas.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Segundos; cubren desde un parseo de microsegundos hasta una consulta lenta
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: se esperaban labels {self.labelnames}")
+        return tuple(str(label) for label in labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Gauge(_Metric):
+    """Valor que sube y baja; con `function` se lee al momento de exponer
+    (si devuelve None no se expone)."""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def _samples(self):
+        if self.function is not None:
+            try:
+                value = self.function()
+            except Exception:
+                return []
+            return [] if value is None else [f"{self.name} {_format_value(value)}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        key = self._key(labels)
+        # Conteos por bucket no acumulados; se acumulan al exponer
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total, count))
+                           for key, (counts, total, count) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def render():
+    """Todas las métricas registradas, en el formato de exposición 0.0.4."""
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Métricas compartidas por todos los módulos
+span_seconds = Histogram(
+    "trackvuelos_span_seconds",
+    "Duración de cada etapa de la verificación",
+    ["span"],
+)
+bytes_downloaded = Counter(
+    "trackvuelos_bytes_downloaded_total",
+    "Bytes descargados de cada fuente",
+    ["source"],
+)
+rows_scanned = Counter(
+    "trackvuelos_rows_scanned_total",
+    "Filas de estado revisadas por el filtro de la flota",
+    ["source"],
+)
+upstream_requests = Counter(
+    "trackvuelos_upstream_requests_total",
+    "Consultas a las fuentes, por resultado",
+    ["source", "status"],
+)
+cache_requests = Counter(
+    "trackvuelos_cache_requests_total",
+    "Lecturas de caché, por caché y resultado (hit/stale/miss)",
+    ["cache", "result"],
+)
+notifications = Counter(
+    "trackvuelos_notifications_total",
+    "Mensajes de Telegram por resultado (queued/sent/retried/dropped)",
+    ["result"],
+)
+
+
+def percentile(values, fraction):
+    """Percentil por rango más cercano de una ventana chica de valores (no vacía)."""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def span(name):
+    """Context manager que mide una etapa en trackvuelos_span_seconds."""
+    return span_seconds.time(name)
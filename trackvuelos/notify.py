@@ -0,0 +1,277 @@
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from . import metrics, transport
+from .atomic import atomic_write
+
+TELEGRAM_API = "https://api.telegram.org/bot{}/sendMessage"
+TELEGRAM_TIMEOUT = 10
+# Mensajes pendientes, uno por archivo; sobreviven a un reinicio
+TELEGRAM_SPOOL_DIR = os.getenv("TELEGRAM_SPOOL_DIR", "telegram_spool")
+TELEGRAM_WORKERS = int(os.getenv("TELEGRAM_WORKERS", "2"))
+# Segundos mínimos entre mensajes al mismo chat (Telegram permite ~1/s)
+TELEGRAM_CHAT_INTERVAL = float(os.getenv("TELEGRAM_CHAT_INTERVAL", "1"))
+TELEGRAM_MAX_BACKOFF = 300
+TELEGRAM_MAX_LENGTH = 4096
+
+logger = logging.getLogger(__name__)
+
+_SEPARATOR = "\n\n────────\n\n"
+
+
+class TelegramError(Exception):
+    def __init__(self, message, retry_after=None, permanent=False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.permanent = permanent
+
+
+def chat_ids():
+    """TELEGRAM_CHAT_ID acepta varios chats separados por coma."""
+    return [chat_id.strip() for chat_id in os.getenv("TELEGRAM_CHAT_ID", "").split(",") if chat_id.strip()]
+
+
+def send_telegram(chat_id, text):
+    """Envía un mensaje y lanza TelegramError si Telegram no lo aceptó.
+
+    Ante un 429 el error trae el `retry_after` que informa Telegram; los
+    demás 4xx son permanentes (chat inexistente, token inválido, etc.).
+    """
+    token = os.getenv("TELEGRAM_TOKEN")
+    if not token:
+        raise TelegramError("TELEGRAM_TOKEN no configurado", permanent=True)
+    try:
+        with metrics.span("telegram_send"):
+            response = transport.post(
+                TELEGRAM_API.format(token),
+                data={"chat_id": chat_id, "text": text},
+                timeout=transport.timeouts(TELEGRAM_TIMEOUT)
+            )
+    except Exception as e:
+        raise TelegramError(str(e))
+
+    if response.status_code == 200:
+        return
+    try:
+        body = response.json()
+    except ValueError:
+        body = {}
+    description = body.get("description") or f"status {response.status_code}"
+    if response.status_code == 429:
+        retry_after = (body.get("parameters") or {}).get("retry_after")
+        raise TelegramError(description, retry_after=float(retry_after or 1))
+    raise TelegramError(description, permanent=400 <= response.status_code < 500)
+
+
+def coalesce(messages, limit=TELEGRAM_MAX_LENGTH):
+    """Junta los mensajes de un mismo tick en la menor cantidad de mensajes
+    que entren en el límite de Telegram."""
+    merged = []
+    current = ""
+    for text in messages:
+        if len(text) > limit:
+            text = text[:limit - 1] + "…"
+        if current and len(current) + len(_SEPARATOR) + len(text) <= limit:
+            current += _SEPARATOR + text
+        else:
+            if current:
+                merged.append(current)
+            current = text
+    if current:
+        merged.append(current)
+    return merged
+
+
+class TelegramQueue:
+    """Cola de salida hacia Telegram atendida por un pool de threads.
+
+    Cada mensaje se escribe en `spool_dir` antes de encolarse y se borra
+    recién cuando Telegram lo aceptó, así que los pendientes se reenvían al
+    reiniciar. Por chat se respeta el orden, un intervalo mínimo entre
+    mensajes y el `retry_after` de los 429; los errores transitorios se
+    reintentan con backoff exponencial.
+    """
+
+    def __init__(self, spool_dir=TELEGRAM_SPOOL_DIR, workers=TELEGRAM_WORKERS,
+                 chat_interval=TELEGRAM_CHAT_INTERVAL, send=send_telegram):
+        self.spool_dir = spool_dir
+        self.workers = workers
+        self.chat_interval = chat_interval
+        self.send = send
+        self._cond = threading.Condition()
+        self._chats = {}
+        self._next_at = {}
+        self._busy = set()
+        self._seq = itertools.count()
+        self._started = False
+        self._spool_ok = True
+        self.sent = 0
+        self.dropped = 0
+
+    def start(self):
+        """Carga lo que quedó en el spool y arranca los workers (una sola vez)."""
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+            for entry in self._load_spool():
+                self._chats.setdefault(entry["chat_id"], deque()).append(entry)
+            pending = self._pending()
+        if pending:
+            logger.info("Telegram: %d mensajes pendientes recuperados del spool", pending)
+        for i in range(self.workers):
+            threading.Thread(target=self._worker, name=f"telegram-{i}", daemon=True).start()
+
+    def submit(self, text, chats=None):
+        chats = chat_ids() if chats is None else chats
+        if not chats or not os.getenv("TELEGRAM_TOKEN"):
+            return
+        self.start()
+        with self._cond:
+            for chat_id in chats:
+                entry = {"chat_id": chat_id, "text": text, "created": time.time(), "attempts": 0}
+                entry["path"] = self._spool(entry)
+                self._chats.setdefault(chat_id, deque()).append(entry)
+                metrics.notifications.inc("queued")
+            self._cond.notify_all()
+
+    def _pending(self):
+        return sum(len(queue) for queue in self._chats.values())
+
+    def stats(self):
+        with self._cond:
+            return {"pending": self._pending(), "sent": self.sent, "dropped": self.dropped}
+
+    def _spool(self, entry):
+        if not self._spool_ok:
+            return None
+        name = f"{time.time_ns():020d}-{next(self._seq):06d}.json"
+        path = os.path.join(self.spool_dir, name)
+        data = {key: entry[key] for key in ("chat_id", "text", "created")}
+        try:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            atomic_write(path, json.dumps(data, ensure_ascii=False).encode())
+            return path
+        except OSError as e:
+            # Sin disco escribible se sigue solo en memoria
+            logger.warning("Telegram: spool deshabilitado (%s)", e)
+            self._spool_ok = False
+            return None
+
+    def _load_spool(self):
+        if not os.path.isdir(self.spool_dir):
+            return []
+        entries = []
+        for name in sorted(os.listdir(self.spool_dir)):
+            path = os.path.join(self.spool_dir, name)
+            if not name.endswith(".json"):
+                if ".json.tmp-" in name:
+                    os.remove(path)
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                os.remove(path)
+                continue
+            entry["path"] = path
+            entry["attempts"] = 0
+            entries.append(entry)
+        return entries
+
+    def _unspool(self, entry):
+        if entry.get("path"):
+            try:
+                os.remove(entry["path"])
+            except OSError:
+                pass
+
+    def _take(self):
+        """Próximo mensaje de un chat libre y habilitado; espera si no hay."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wake = None
+                for chat_id, queue in self._chats.items():
+                    if not queue or chat_id in self._busy:
+                        continue
+                    next_at = self._next_at.get(chat_id, 0.0)
+                    if next_at <= now:
+                        self._busy.add(chat_id)
+                        return chat_id, queue[0]
+                    wake = next_at if wake is None else min(wake, next_at)
+                self._cond.wait(None if wake is None else wake - now)
+
+    def _worker(self):
+        while True:
+            chat_id, entry = self._take()
+            delay = self.chat_interval
+            done = True
+            dropped = False
+            try:
+                self.send(chat_id, entry["text"])
+            except TelegramError as e:
+                if e.permanent:
+                    logger.error("Error enviando mensaje por Telegram (descartado): %s", e,
+                                 extra={"chat_id": chat_id})
+                    dropped = True
+                else:
+                    done = False
+                    metrics.notifications.inc("retried")
+                    entry["attempts"] += 1
+                    if e.retry_after is not None:
+                        delay = e.retry_after
+                    else:
+                        delay = min(TELEGRAM_MAX_BACKOFF, 2 ** entry["attempts"])
+                    logger.warning("Error enviando mensaje por Telegram, reintento en %.1f s: %s", delay, e,
+                                   extra={"chat_id": chat_id, "attempts": entry["attempts"]})
+            except Exception as e:
+                done = False
+                metrics.notifications.inc("retried")
+                entry["attempts"] += 1
+                delay = min(TELEGRAM_MAX_BACKOFF, 2 ** entry["attempts"])
+                logger.warning("Error enviando mensaje por Telegram, reintento en %.1f s: %s", delay, e,
+                               extra={"chat_id": chat_id, "attempts": entry["attempts"]})
+
+            if done:
+                self._unspool(entry)
+            with self._cond:
+                if done:
+                    self._chats[chat_id].popleft()
+                    if dropped:
+                        self.dropped += 1
+                    else:
+                        self.sent += 1
+                    metrics.notifications.inc("dropped" if dropped else "sent")
+                self._next_at[chat_id] = time.monotonic() + delay
+                self._busy.discard(chat_id)
+                self._cond.notify_all()
+
+
+telegram_queue = TelegramQueue()
+
+metrics.Gauge("trackvuelos_telegram_pending", "Mensajes de Telegram esperando envío",
+              function=lambda: telegram_queue.stats()["pending"])
+
+
+def notify_telegram(msg):
+    """Encola el mensaje para todos los chats configurados; no bloquea."""
+    telegram_queue.submit(msg)
+
+
+def notify_telegram_now(msg):
+    """Envío sincrónico, para el handler serverless donde no sobreviven threads."""
+    if not os.getenv("TELEGRAM_TOKEN"):
+        return
+    for chat_id in chat_ids():
+        try:
+            send_telegram(chat_id, msg)
+            metrics.notifications.inc("sent")
+        except TelegramError as e:
+            metrics.notifications.inc("dropped")
+            logger.error("Error enviando mensaje por Telegram: %s", e, extra={"chat_id": chat_id})
@@ -0,0 +1,80 @@
+"""Observación de un avión normalizada, sea cual sea la fuente.
+
+OpenSky y ADSB.one reportan en unidades distintas (metros/pies, m/s/nudos);
+cada cliente convierte a una Observation con las mismas unidades y los
+tiempos de cada dato, que fusion usa para quedarse con el más fresco. Es lo
+que recorre el tracker, los mensajes y el historial; to_dict() arma el JSON
+de la API.
+"""
+FEET_TO_M = 0.3048
+KNOTS_TO_KMH = 1.852
+MS_TO_KMH = 3.6
+MS_TO_FPM = 196.85
+
+
+class Observation:
+    """altitude en metros, velocity en km/h, baro_rate en ft/min, heading en
+    grados; position_time y contact_time en epoch (segundos) de la última
+    posición y del último mensaje. Los datos que faltan son None.
+
+    `callsign` es el que transmite el avión; `registration` la matrícula de
+    la flota, que asigna el tracker.
+    """
+
+    __slots__ = (
+        "icao24", "callsign", "altitude", "velocity", "country", "lat", "lon",
+        "heading", "baro_rate", "squawk", "on_ground", "position_time",
+        "contact_time", "source", "registration",
+    )
+
+    def __init__(self, icao24, callsign="", altitude=None, velocity=None, country=None,
+                 lat=None, lon=None, heading=None, baro_rate=None, squawk="",
+                 on_ground=False, position_time=None, contact_time=None, source="",
+                 registration=None):
+        self.icao24 = icao24
+        self.callsign = callsign
+        self.altitude = altitude
+        self.velocity = velocity
+        self.country = country
+        self.lat = lat
+        self.lon = lon
+        self.heading = heading
+        self.baro_rate = baro_rate
+        self.squawk = squawk
+        self.on_ground = on_ground
+        self.position_time = position_time
+        self.contact_time = contact_time
+        self.source = source
+        self.registration = registration
+
+    def replace(self, **changes):
+        """Copia con algunos campos cambiados."""
+        values = {field: getattr(self, field) for field in self.__slots__}
+        values.update(changes)
+        return Observation(**values)
+
+    def to_dict(self):
+        """El dict de la API y el dashboard (`callsign` es la matrícula, como siempre)."""
+        return {
+            "icao24": self.icao24,
+            "callsign": self.registration or self.callsign,
+            "altitude": self.altitude,
+            "velocity": self.velocity,
+            "country": self.country,
+            "lat": self.lat,
+            "lon": self.lon,
+            "heading": self.heading,
+            "baro_rate": self.baro_rate,
+            "squawk": self.squawk,
+            "source": self.source,
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, Observation):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Observation({self.registration or self.icao24}, {self.source}, {self.lat}, {self.lon}, {self.altitude})"
@@ -0,0 +1,327 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+
+import requests
+
+from . import metrics, transport
+from .log import Sampler
+from .observation import MS_TO_FPM, MS_TO_KMH, Observation
+
+# Se puede apuntar a un servidor local (ver benchmarks/replay.py)
+OPENSKY_URL = os.getenv("OPENSKY_URL", "https://opensky-network.org/api/states/all")
+OPENSKY_TIMEOUT = int(os.getenv("OPENSKY_TIMEOUT", "30"))
+
+# auto: icao24 -> bbox -> global | icao24 | bbox | global
+OPENSKY_QUERY_MODE = os.getenv("OPENSKY_QUERY_MODE", "auto").lower()
+
+# Margen en grados alrededor de los aeropuertos para armar la caja de consulta
+OPENSKY_BBOX_MARGIN = float(os.getenv("OPENSKY_BBOX_MARGIN", "6"))
+
+OPENSKY_CHUNK_SIZE = 64 * 1024
+
+# Más icao24 que esto no entran en la URL: se pasa directo a la caja/global
+OPENSKY_MAX_ICAO24_PARAMS = int(os.getenv("OPENSKY_MAX_ICAO24_PARAMS", "100"))
+
+# Inicio de una fila de "states": '["<icao24>"'. Fuera de los strings es la
+# única forma en que aparece un '[' seguido de un string.
+_ROW_START = re.compile(rb'\[\s*"(~?[0-9a-fA-F]{6})"')
+_ROW_START_MAX_LEN = 32
+# Con pocos aviones es más rápido buscar sus icao24 literales que cada fila
+_LITERAL_SEARCH_MAX = 256
+# Fila completa: lista plana salvo "sensors", que puede ser [int, ...]
+_ROW = re.compile(rb'\[(?:"(?:[^"\\]|\\.)*"|\[[^\]]*\]|[^\[\]"])*\]')
+
+# Estadísticas de la última consulta (estrategia, bytes, tiempos)
+last_poll_stats = {}
+
+logger = logging.getLogger(__name__)
+# Las filas del loop del filtro se loguean en DEBUG, una de cada 1/LOG_SAMPLE_RATE
+_row_sampler = Sampler()
+
+CREDIT_WINDOW = 24 * 3600
+# Créditos gastados (monotonic, créditos) en las últimas 24 h
+_credit_log = deque()
+_usage_lock = threading.Lock()
+# Lo último que informó OpenSky en los headers X-Rate-Limit-*
+rate_limit = {"remaining": None, "retry_at": 0.0}
+
+metrics.Gauge("trackvuelos_opensky_credits_remaining", "Último X-Rate-Limit-Remaining de OpenSky",
+              function=lambda: rate_limit["remaining"])
+metrics.Gauge("trackvuelos_opensky_credits_used_24h", "Créditos de OpenSky usados en las últimas 24 h",
+              function=lambda: credits_used())
+
+
+class OpenSkyError(Exception):
+    pass
+
+
+def build_bbox(airports, margin=OPENSKY_BBOX_MARGIN):
+    lats = [airport["lat"] for airport in airports.values()]
+    lons = [airport["lon"] for airport in airports.values()]
+    return {
+        "lamin": round(max(-90.0, min(lats) - margin), 4),
+        "lomin": round(max(-180.0, min(lons) - margin), 4),
+        "lamax": round(min(90.0, max(lats) + margin), 4),
+        "lomax": round(min(180.0, max(lons) + margin), 4),
+    }
+
+
+def query_credits(params):
+    """Créditos que cobra OpenSky por una consulta a /states/all.
+
+    Dependen del área de la caja en grados cuadrados; sin caja (global o
+    por icao24) se cobra el máximo.
+    """
+    if all(key in params for key in ("lamin", "lomin", "lamax", "lomax")):
+        area = (params["lamax"] - params["lamin"]) * (params["lomax"] - params["lomin"])
+        if area <= 25:
+            return 1
+        if area <= 100:
+            return 2
+        if area <= 400:
+            return 3
+    return 4
+
+
+def credits_used(window=CREDIT_WINDOW):
+    """Créditos gastados en los últimos `window` segundos."""
+    now = time.monotonic()
+    with _usage_lock:
+        while _credit_log and _credit_log[0][0] < now - CREDIT_WINDOW:
+            _credit_log.popleft()
+        return sum(credits for at, credits in _credit_log if at >= now - window)
+
+
+def retry_after():
+    """Segundos que faltan para poder volver a consultar tras un 429 (0 si ya se puede)."""
+    return max(0.0, rate_limit["retry_at"] - time.monotonic())
+
+
+def _update_rate_limit(response, params):
+    remaining = response.headers.get("X-Rate-Limit-Remaining")
+    if remaining is not None and remaining.lstrip("-").isdigit():
+        rate_limit["remaining"] = int(remaining)
+
+    if response.status_code == 429:
+        wait = response.headers.get("X-Rate-Limit-Retry-After-Seconds") or response.headers.get("Retry-After")
+        try:
+            wait = float(wait)
+        except (TypeError, ValueError):
+            wait = 60.0
+        rate_limit["retry_at"] = time.monotonic() + wait
+    elif response.status_code == 200:
+        with _usage_lock:
+            _credit_log.append((time.monotonic(), query_credits(params)))
+
+
+def iter_states(chunks, wanted=None):
+    """Recorre el array "states" chunk a chunk sin armar el documento completo.
+
+    Solo se decodifican las filas cuyo icao24 está en `wanted` (bytes en
+    minúscula, o todas si es None); el resto se saltea buscando el inicio de
+    la fila siguiente, así que la memoria queda acotada al chunk en curso.
+    """
+    row_start = _ROW_START
+    if wanted is not None and len(wanted) <= _LITERAL_SEARCH_MAX:
+        row_start = re.compile(
+            rb'\[\s*"(' + b"|".join(re.escape(icao24) for icao24 in sorted(wanted)) + rb')"',
+            re.IGNORECASE,
+        )
+
+    buffer = b""
+
+    for chunk in chunks:
+        buffer += chunk
+        pos = 0
+
+        for start in row_start.finditer(buffer):
+            if start.start() < pos:
+                continue
+            if wanted is not None and start.group(1).lower() not in wanted:
+                pos = start.end()
+                continue
+
+            row = _ROW.match(buffer, start.start())
+            if not row:
+                # La fila sigue en el próximo chunk
+                pos = start.start()
+                break
+            yield json.loads(row.group())
+            pos = row.end()
+        else:
+            # Conservar la cola por si un inicio de fila quedó partido
+            pos = max(pos, len(buffer) - _ROW_START_MAX_LEN)
+
+        buffer = buffer[pos:]
+
+
+def plan_queries(icao24s=None, airports=None, mode=None):
+    """Devuelve las consultas a intentar en orden, de la más barata a la global."""
+    mode = mode or OPENSKY_QUERY_MODE
+    plan = []
+
+    if mode in ("auto", "icao24") and icao24s and len(icao24s) <= OPENSKY_MAX_ICAO24_PARAMS:
+        plan.append(("icao24", {"icao24": sorted(icao24s)}))
+    # Sin icao24 o con demasiados para la URL, el modo icao24 sigue como auto
+    fallback = mode == "icao24" and not plan
+    if (mode in ("auto", "bbox") or fallback) and airports:
+        plan.append(("bbox", build_bbox(airports)))
+    if mode in ("auto", "global") or fallback or not plan:
+        plan.append(("global", {}))
+
+    return plan
+
+
+def _read_streaming(response, wanted):
+    counter = {"bytes": 0, "parse_s": 0.0}
+
+    def chunks():
+        for chunk in response.iter_content(chunk_size=OPENSKY_CHUNK_SIZE):
+            counter["bytes"] += len(chunk)
+            yield chunk
+
+    states = []
+    parse_started = time.perf_counter()
+    for state in iter_states(chunks(), wanted):
+        states.append(state)
+    # Incluye la espera de red entre chunks: es el tiempo total de lectura
+    parse_ms = (time.perf_counter() - parse_started) * 1000
+    return states, counter["bytes"], parse_ms
+
+
+def fetch_states(icao24s=None, airports=None, mode=None, wanted=None):
+    """Consulta /states/all usando el plan más barato que responda.
+
+    Solo se pasa a la siguiente estrategia si la anterior falla; una
+    respuesta 200 sin aviones es válida. Ante un 429 no se insiste con
+    consultas más caras, ni se vuelve a consultar hasta que pase el
+    X-Rate-Limit-Retry-After-Seconds informado. `wanted` evita recalcular
+    el set de bytes del filtro en cada consulta (ver fleet.Fleet.wanted).
+    """
+    global last_poll_stats
+    last_error = None
+    wait = retry_after()
+    if wait > 0:
+        last_poll_stats = {"strategy": None, "error": "rate limited", "retry_after": round(wait)}
+        raise OpenSkyError(f"OpenSky limitó las consultas, reintentar en {wait:.0f} s")
+    if wanted is None and icao24s:
+        wanted = {icao24.lower().encode() for icao24 in icao24s}
+
+    for strategy, params in plan_queries(icao24s, airports, mode):
+        # Sin filtro llega el feed global entero
+        streaming = not params
+        started = time.perf_counter()
+        try:
+            response = transport.get(OPENSKY_URL, params=params, timeout=transport.timeouts(OPENSKY_TIMEOUT),
+                                     stream=streaming)
+        except requests.RequestException as e:
+            last_error = e
+            metrics.upstream_requests.inc("opensky", "error")
+            logger.warning("OpenSky [%s] error: %s", strategy, e, extra={"strategy": strategy})
+            continue
+        fetch_ms = (time.perf_counter() - started) * 1000
+        metrics.span_seconds.observe(fetch_ms / 1000, "opensky_fetch")
+        metrics.upstream_requests.inc("opensky", response.status_code)
+        _update_rate_limit(response, params)
+
+        if response.status_code != 200:
+            last_error = OpenSkyError(f"status {response.status_code}")
+            logger.warning("OpenSky [%s] response: status %s", strategy, response.status_code,
+                           extra={"strategy": strategy, "status": response.status_code})
+            if response.status_code == 429:
+                break
+            continue
+
+        if streaming:
+            # El feed global pesa varios MB: se parsea en streaming y solo se
+            # conservan las filas de los aviones pedidos
+            states, size, parse_ms = _read_streaming(response, wanted)
+        else:
+            body = response.content
+            size = len(body)
+            parse_started = time.perf_counter()
+            data = json.loads(body)
+            parse_ms = (time.perf_counter() - parse_started) * 1000
+            states = data.get("states") or []
+        metrics.span_seconds.observe(parse_ms / 1000, "opensky_parse")
+        metrics.bytes_downloaded.inc("opensky", amount=size)
+
+        last_poll_stats = {
+            "strategy": strategy,
+            "status": response.status_code,
+            "bytes": size,
+            "rows": len(states),
+            "fetch_ms": round(fetch_ms, 1),
+            "parse_ms": round(parse_ms, 1),
+            "credits": query_credits(params),
+            "rate_limit_remaining": rate_limit["remaining"],
+        }
+        logger.info("OpenSky [%s]: %d bytes, %d filas, descarga %.0f ms, parseo %.1f ms",
+                    strategy, size, len(states), fetch_ms, parse_ms, extra=last_poll_stats)
+        return states
+
+    last_poll_stats = {"strategy": None, "error": str(last_error)}
+    raise OpenSkyError(f"OpenSky no disponible: {last_error}")
+
+
+def parse_state(state):
+    """Observation de un state vector, leído por índice (ver la doc de
+    /states/all): altitud geométrica, o barométrica si falta."""
+    altitude = state[13]
+    if altitude is None:
+        altitude = state[7]
+    velocity = state[9]
+    vertical_rate = state[11]
+    return Observation(
+        state[0].lower(),
+        state[1].strip() if state[1] else "",
+        altitude,
+        round(velocity * MS_TO_KMH, 1) if velocity is not None else None,
+        state[2] or None,
+        state[6],
+        state[5],
+        state[10],
+        round(vertical_rate * MS_TO_FPM) if vertical_rate is not None else None,
+        state[14] if len(state) > 14 and state[14] else "",
+        bool(state[8]),
+        state[3],
+        state[4],
+        "OpenSky",
+    )
+
+
+def fleet_states(fleet, airports=None, icao24s=None):
+    """State vectors de los aviones de la flota (fleet.Fleet), por icao24.
+
+    Con `icao24s` solo se consulta ese subconjunto de la flota.
+    Lanza OpenSkyError si ninguna consulta respondió.
+    """
+    results = {}
+    if icao24s is None:
+        hexes, wanted = fleet.hexes, fleet.wanted
+    else:
+        hexes = frozenset(icao24 for icao24 in icao24s if icao24 in fleet)
+        wanted = None
+    states = fetch_states(hexes, airports, wanted=wanted)
+    debug_rows = logger.isEnabledFor(logging.DEBUG)
+    with metrics.span("row_filter"):
+        for state in states:
+            if debug_rows and _row_sampler():
+                logger.debug("Fila de OpenSky %s", state[0], extra={"row": state})
+            if len(state) < 14:
+                continue
+            icao24 = state[0].lower() if state[0] else None
+            if icao24 in hexes:
+                results[icao24] = state
+    metrics.rows_scanned.inc("opensky", amount=len(states))
+    return results
+
+
+def check_opensky(fleet, airports=None, icao24s=None):
+    """Observation de los aviones de la flota vistos por OpenSky, por icao24 (ver fleet_states)."""
+    return {icao24: parse_state(state) for icao24, state in fleet_states(fleet, airports, icao24s).items()}
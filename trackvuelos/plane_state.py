@@ -0,0 +1,112 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from .atomic import atomic_write
+
+logger = logging.getLogger(__name__)
+
+
+class PlaneState:
+    """Aviones activos y notificados, protegidos por un lock.
+
+    Los lectores reciben copias inmutables, así que pueden iterarlas mientras
+    el monitor actualiza el estado. Los cambios marcan el estado como sucio
+    y save() solo escribe si hubo alguno, con reemplazo atómico del archivo.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        # Serializa las escrituras para que una vieja no pise a una nueva
+        self._save_lock = threading.Lock()
+        self._active = set()
+        self._notified = set()
+        # Se incrementa en cada cambio; save() compara contra lo último escrito
+        self._version = 0
+        self._saved_version = 0
+
+    @property
+    def dirty(self):
+        with self._lock:
+            return self._version != self._saved_version
+
+    def _changed(self):
+        self._version += 1
+
+    def load(self):
+        with self._lock:
+            self._notified = set()
+            self._active = set()
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r') as f:
+                        state = json.load(f)
+                    self._notified = set(state.get('notified_planes', []))
+                    self._active = set(state.get('active_planes', []))
+                except (OSError, ValueError, AttributeError, TypeError) as e:
+                    # No pisar el archivo dañado: se aparta para poder revisarlo
+                    corrupt = f"{self.path}.corrupt-{int(time.time())}"
+                    logger.error("Estado ilegible en %s (%s); se movió a %s", self.path, e, corrupt)
+                    try:
+                        os.replace(self.path, corrupt)
+                    except OSError:
+                        pass
+            self._saved_version = self._version
+
+    def save(self):
+        """Escribe el estado si cambió desde la última escritura; devuelve si escribió."""
+        with self._save_lock:
+            with self._lock:
+                version = self._version
+                if version == self._saved_version:
+                    return False
+                data = {
+                    'notified_planes': sorted(self._notified),
+                    'active_planes': sorted(self._active)
+                }
+            try:
+                atomic_write(self.path, json.dumps(data, indent=2).encode())
+            except Exception as e:
+                logger.error("Error guardando estado: %s", e)
+                return False
+            with self._lock:
+                self._saved_version = version
+            return True
+
+    @property
+    def active(self):
+        with self._lock:
+            return frozenset(self._active)
+
+    @property
+    def notified(self):
+        with self._lock:
+            return frozenset(self._notified)
+
+    def is_notified(self, registration):
+        with self._lock:
+            return registration in self._notified
+
+    def mark_notified(self, registration):
+        with self._lock:
+            if registration not in self._notified:
+                self._notified.add(registration)
+                self._changed()
+
+    def clear_notified(self, registration):
+        with self._lock:
+            if registration in self._notified:
+                self._notified.remove(registration)
+                self._changed()
+                return True
+            return False
+
+    def set_active(self, registrations):
+        with self._lock:
+            registrations = set(registrations)
+            if registrations != self._active:
+                self._active = registrations
+                self._changed()
@@ -0,0 +1,294 @@
+import heapq
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from . import opensky
+from .config import POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Avión "caliente": en vuelo cerca de un aeropuerto (despegue/aproximación)
+# o con régimen vertical fuerte
+POLL_TERMINAL_INTERVAL = float(os.getenv("POLL_TERMINAL_INTERVAL", "15"))
+# Avión en vuelo lejos de los aeropuertos
+POLL_ACTIVE_INTERVAL = float(os.getenv("POLL_ACTIVE_INTERVAL", "30"))
+# Barrido de toda la flota sin aviones en vuelo: arranca en POLL_IDLE_INTERVAL
+# y se multiplica por POLL_IDLE_BACKOFF en cada barrido vacío hasta
+# POLL_IDLE_MAX_INTERVAL
+POLL_IDLE_INTERVAL = float(os.getenv("POLL_IDLE_INTERVAL", "60"))
+POLL_IDLE_MAX_INTERVAL = float(os.getenv("POLL_IDLE_MAX_INTERVAL", str(POLL_INTERVAL)))
+POLL_IDLE_BACKOFF = float(os.getenv("POLL_IDLE_BACKOFF", "2"))
+POLL_NEAR_AIRPORT_KM = float(os.getenv("POLL_NEAR_AIRPORT_KM", "40"))
+POLL_HOT_BARO_RATE = float(os.getenv("POLL_HOT_BARO_RATE", "1500"))
+# Aviones que vencen dentro de esta ventana van en la misma consulta dirigida
+POLL_BATCH_WINDOW = float(os.getenv("POLL_BATCH_WINDOW", "3"))
+# Consultas dirigidas por avión (AircraftQueue); false = toda la flota junta
+POLL_TIERS = os.getenv("POLL_TIERS", "true").lower() == "true"
+# Créditos diarios de OpenSky (400 anónimo, 4000 con cuenta); 0 = sin tope
+OPENSKY_DAILY_CREDITS = int(os.getenv("OPENSKY_DAILY_CREDITS", "0"))
+# Con menos créditos restantes que esto se pasa al intervalo máximo
+POLL_CREDIT_RESERVE = int(os.getenv("POLL_CREDIT_RESERVE", "20"))
+# Créditos diarios de OpenSky para consultas dirigidas (4 cada una, sin caja),
+# repartidos por hora; pasado ese ritmo las dirigidas van solo a ADSB.one
+POLL_TARGETED_CREDITS = int(os.getenv("POLL_TARGETED_CREDITS", "400"))
+
+
+class AircraftQueue:
+    """Próxima consulta de cada avión en vuelo, en un heap por vencimiento.
+
+    Las entradas viejas quedan en el heap y se descartan al llegar al tope
+    (borrado perezoso); `_due` tiene el vencimiento vigente de cada avión.
+    """
+
+    def __init__(self, intervals, batch_window=POLL_BATCH_WINDOW):
+        self.intervals = intervals
+        self.batch_window = batch_window
+        self._heap = []
+        self._due = {}
+
+    def __len__(self):
+        return len(self._due)
+
+    def schedule(self, icao24, tier, now):
+        due = now + self.intervals[tier]
+        self._due[icao24] = (due, tier)
+        heapq.heappush(self._heap, (due, icao24))
+
+    def retain(self, icao24s):
+        """Saca de la cola a los aviones que no están en `icao24s`."""
+        for icao24 in [icao24 for icao24 in self._due if icao24 not in icao24s]:
+            del self._due[icao24]
+
+    def _discard_stale(self):
+        heap = self._heap
+        while heap:
+            due, icao24 = heap[0]
+            current = self._due.get(icao24)
+            if current is not None and current[0] == due:
+                return
+            heapq.heappop(heap)
+
+    def next_due(self):
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Aviones vencidos (o por vencer dentro de batch_window), fuera de la cola."""
+        batch = []
+        horizon = now + self.batch_window
+        while True:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > horizon:
+                return batch
+            _, icao24 = heapq.heappop(self._heap)
+            del self._due[icao24]
+            batch.append(icao24)
+
+    def counts(self):
+        counts = dict.fromkeys(self.intervals, 0)
+        for _, tier in list(self._due.values()):
+            counts[tier] += 1
+        return counts
+
+
+class PollScheduler:
+    """Llama a `tick` en un loop con intervalo adaptativo.
+
+    `tick(icao24s=None)` consulta toda la flota (barrido) o solo esos
+    aviones, y devuelve la lista de aviones en vuelo.
+
+    Sin `tiers`, todo se consulta junto: rápido si algún avión es caliente
+    según `is_hot`, medio si hay aviones en vuelo y con backoff exponencial
+    si no hay ninguno.
+
+    Con `tiers`, cada avión en vuelo tiene su propio vencimiento en una
+    AircraftQueue (calientes cada POLL_TERMINAL_INTERVAL, el resto cada
+    POLL_ACTIVE_INTERVAL) y se consultan en lotes dirigidos por icao24; el
+    barrido de la flota, que detecta despegues, va al ritmo de inactividad.
+    Las dirigidas consultan OpenSky mientras no pasen de `targeted_credits`
+    por día (a ritmo parejo por hora) y después solo ADSB.one, que no cobra:
+    `tick(icao24s, use_opensky=False)`.
+
+    Los ticks se programan sobre time.monotonic() desde el inicio del
+    anterior, así una consulta lenta no corre el calendario.
+    """
+
+    def __init__(self, tick, is_hot=None, tiers=False,
+                 terminal_interval=POLL_TERMINAL_INTERVAL,
+                 active_interval=POLL_ACTIVE_INTERVAL,
+                 idle_interval=POLL_IDLE_INTERVAL,
+                 idle_max_interval=POLL_IDLE_MAX_INTERVAL,
+                 idle_backoff=POLL_IDLE_BACKOFF,
+                 daily_credits=OPENSKY_DAILY_CREDITS,
+                 targeted_credits=POLL_TARGETED_CREDITS):
+        self.tick = tick
+        self.is_hot = is_hot
+        self.terminal_interval = terminal_interval
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.idle_max_interval = max(idle_interval, idle_max_interval)
+        self.idle_backoff = idle_backoff
+        self.daily_credits = daily_credits
+        self.targeted_credits = targeted_credits
+        self.queue = AircraftQueue({"hot": terminal_interval, "warm": active_interval}) if tiers else None
+        self._idle_delay = idle_interval
+        self._lock = threading.Lock()
+        # Inicio (monotonic) de los ticks de la última hora, por tipo
+        self._ticks = deque()
+        self._targeted = deque()
+        # (monotonic, créditos) de las dirigidas a OpenSky de la última hora
+        self._targeted_credit_log = deque()
+        self._mode = None
+        self._interval = None
+        self._last_tick_ms = None
+
+    def _tier(self, plane_data):
+        return "hot" if self.is_hot and self.is_hot(plane_data) else "warm"
+
+    def next_delay(self, planes_info):
+        """Segundos hasta el próximo barrido y el motivo."""
+        if planes_info:
+            self._idle_delay = self.idle_interval
+            if self.queue is not None:
+                # Los aviones en vuelo van por la cola; el barrido solo busca despegues
+                mode, delay = "sweep", self.idle_interval
+            elif any(self._tier(plane) == "hot" for plane in planes_info):
+                mode, delay = "terminal", self.terminal_interval
+            else:
+                mode, delay = "active", self.active_interval
+        else:
+            mode, delay = "idle", self._idle_delay
+            self._idle_delay = min(self.idle_max_interval, self._idle_delay * self.idle_backoff)
+
+        if self._over_budget():
+            mode, delay = "budget", max(delay, self.idle_max_interval)
+
+        wait = opensky.retry_after()
+        if wait > delay:
+            mode, delay = "rate_limited", wait
+
+        return delay, mode
+
+    def _over_budget(self):
+        remaining = opensky.rate_limit["remaining"]
+        return ((remaining is not None and remaining < POLL_CREDIT_RESERVE)
+                or bool(self.daily_credits and opensky.credits_used() >= self.daily_credits))
+
+    def _targeted_opensky(self, now):
+        """Si la próxima dirigida entra en el ritmo horario de targeted_credits."""
+        with self._lock:
+            log = self._targeted_credit_log
+            while log and log[0][0] < now - 3600:
+                log.popleft()
+            return sum(credits for _, credits in log) < self.targeted_credits / 24
+
+    def _run_tick(self, icao24s=None, use_opensky=True):
+        started = time.monotonic()
+        try:
+            if icao24s is None:
+                planes_info = self.tick() or []
+            else:
+                planes_info = self.tick(icao24s, use_opensky=use_opensky) or []
+        except Exception:
+            logger.exception("Error en la verificación")
+            planes_info = []
+        return started, planes_info
+
+    def _record(self, ticks, started):
+        with self._lock:
+            ticks.append(started)
+            while ticks and ticks[0] < started - 3600:
+                ticks.popleft()
+            self._last_tick_ms = (time.monotonic() - started) * 1000
+
+    def run_once(self):
+        """Un barrido de toda la flota; devuelve la espera hasta el siguiente."""
+        started, planes_info = self._run_tick()
+        delay, mode = self.next_delay(planes_info)
+
+        if self.queue is not None:
+            seen = set()
+            for plane_data in planes_info:
+                self.queue.schedule(plane_data.icao24, self._tier(plane_data), started)
+                seen.add(plane_data.icao24)
+            self.queue.retain(seen)
+
+        self._record(self._ticks, started)
+        with self._lock:
+            self._mode = mode
+            self._interval = delay
+        return delay
+
+    def run_targeted(self, now):
+        """Consulta dirigida de los aviones vencidos en la cola."""
+        if opensky.retry_after() > 0 or self._over_budget():
+            # Sin presupuesto quedan para el próximo barrido
+            self.queue.retain(())
+            return
+        due = self.queue.pop_due(now)
+        if not due:
+            return
+
+        use_opensky = self._targeted_opensky(now)
+        if use_opensky:
+            with self._lock:
+                self._targeted_credit_log.append((now, opensky.query_credits({"icao24": due})))
+        started, planes_info = self._run_tick(due, use_opensky)
+        due = set(due)
+        for plane_data in planes_info:
+            if plane_data.icao24 in due:
+                self.queue.schedule(plane_data.icao24, self._tier(plane_data), started)
+        # Los perdidos siguen en vuelo (vuelven en planes_info con su último
+        # dato) y se reprograman; los que aterrizaron salen de la cola
+        self._record(self._targeted, started)
+
+    def run(self, stop=None):
+        """Loop hasta que se setee `stop` (threading.Event)."""
+        stop = stop or threading.Event()
+        next_sweep = time.monotonic()
+        while not stop.is_set():
+            now = time.monotonic()
+            if now >= next_sweep:
+                next_sweep = now + self.run_once()
+            elif self.queue is not None:
+                self.run_targeted(now)
+
+            wake = next_sweep
+            if self.queue is not None:
+                due = self.queue.next_due()
+                if due is not None:
+                    wake = min(wake, max(due, time.monotonic() + opensky.retry_after()))
+            if stop.wait(max(0.0, wake - time.monotonic())):
+                break
+
+    def stats(self):
+        with self._lock:
+            ticks = list(self._ticks)
+            targeted = len(self._targeted)
+            targeted_credits = sum(credits for _, credits in self._targeted_credit_log)
+            mode, interval, last_tick_ms = self._mode, self._interval, self._last_tick_ms
+            queued = self.queue.counts() if self.queue is not None else None
+
+        gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+        credits_hour = opensky.credits_used(3600)
+        return {
+            "mode": mode,
+            "interval_s": round(interval, 1) if interval is not None else None,
+            "polls_last_hour": len(ticks) + targeted,
+            "sweeps_last_hour": len(ticks),
+            "targeted_polls_last_hour": targeted,
+            "effective_sweep_interval_s": round(sum(gaps) / len(gaps), 1) if gaps else None,
+            "tiers": queued,
+            "last_tick_ms": round(last_tick_ms, 1) if last_tick_ms is not None else None,
+            "credits_last_hour": credits_hour,
+            "credits_last_24h": opensky.credits_used(),
+            "credits_per_day_projected": credits_hour * 24,
+            "targeted_credits_last_hour": targeted_credits,
+            "daily_credits": self.daily_credits or None,
+            "rate_limit_remaining": opensky.rate_limit["remaining"],
+            # Estrategia, bytes y tiempos de descarga y parseo de la última consulta
+            "last_opensky_poll": opensky.last_poll_stats,
+        }
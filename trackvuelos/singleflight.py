@@ -0,0 +1,45 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Ejecuta una sola llamada a la vez: quienes llegan mientras está en curso
+    esperan y reciben el mismo resultado (o la misma excepción)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._call = None
+
+    @property
+    def in_flight(self):
+        return self._call is not None
+
+    def do(self, fn, *args, **kwargs):
+        with self._lock:
+            call = self._call
+            leader = call is None
+            if leader:
+                call = self._call = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._call = None
+            call.done.set()
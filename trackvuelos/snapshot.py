@@ -0,0 +1,55 @@
+import hashlib
+import time
+from collections import namedtuple
+
+from . import metrics
+from .singleflight import SingleFlight
+
+# Respuesta ya serializada de /api/check; no se modifica una vez publicada
+Snapshot = namedtuple("Snapshot", ["body", "etag", "created_at", "planes_count"])
+
+
+class SnapshotCache:
+    """Guarda el último snapshot publicado por el monitor y coordina los refrescos."""
+
+    def __init__(self, ttl, flight=None):
+        self.ttl = ttl
+        self._snapshot = None
+        self._flight = flight or SingleFlight()
+
+    def publish(self, body, planes_count):
+        snapshot = Snapshot(
+            body=body,
+            etag=hashlib.sha1(body).hexdigest()[:20],
+            created_at=time.time(),
+            planes_count=planes_count,
+        )
+        # Reemplazar la referencia es atómico: los lectores ven el viejo o el nuevo
+        self._snapshot = snapshot
+        return snapshot
+
+    def age(self, snapshot=None):
+        snapshot = snapshot or self._snapshot
+        return time.time() - snapshot.created_at if snapshot else None
+
+    def is_stale(self, snapshot):
+        return snapshot is None or self.age(snapshot) > self.ttl
+
+    def get(self, refresh):
+        """Devuelve el snapshot vigente; si venció, lo refresca con `refresh`.
+
+        `refresh` corre dentro del SingleFlight compartido: si ya hay una
+        verificación en curso se sirve el snapshot anterior, y si todavía no
+        hay ninguno se espera el resultado de esa misma verificación.
+        """
+        snapshot = self._snapshot
+        if not self.is_stale(snapshot):
+            metrics.cache_requests.inc("snapshot", "hit")
+            return snapshot
+        if snapshot is not None and self._flight.in_flight:
+            metrics.cache_requests.inc("snapshot", "stale")
+            return snapshot
+
+        metrics.cache_requests.inc("snapshot", "miss")
+        self._flight.do(refresh)
+        return self._snapshot or snapshot
@@ -0,0 +1,211 @@
+import os
+import sys
+import threading
+from array import array
+
+import numpy as np
+
+from .airports import EARTH_RADIUS_KM
+
+# Puntos en memoria por avión en vuelo; al llenarse se simplifica el tramo
+TRACK_MAX_POINTS = int(os.getenv("TRACK_MAX_POINTS", "2000"))
+# Tolerancia de Douglas–Peucker al aterrizar, en km
+TRACK_SIMPLIFY_KM = float(os.getenv("TRACK_SIMPLIFY_KM", "0.5"))
+
+# Escalas para guardar con enteros: segundos, 1e-5 grados (~1 m), metros
+_SCALES = (1, 1e5, 1e5, 1)
+TRACK_FIELDS = ("ts", "lat", "lon", "altitude")
+
+
+def douglas_peucker(lats, lons, tolerance_km):
+    """Índices de los puntos que sobreviven a Douglas–Peucker.
+
+    Usa una proyección equirectangular centrada en el track, suficiente
+    para tolerancias de cientos de metros.
+    """
+    n = len(lats)
+    if n <= 2:
+        return np.arange(n)
+
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    x = (lon - lon[0]) * np.cos(lat.mean()) * EARTH_RADIUS_KM
+    y = (lat - lat[0]) * EARTH_RADIUS_KM
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        dx = x[last] - x[first]
+        dy = y[last] - y[first]
+        px = x[first + 1:last] - x[first]
+        py = y[first + 1:last] - y[first]
+        length = np.hypot(dx, dy)
+        if length > 0:
+            distances = np.abs(dx * py - dy * px) / length
+        else:
+            distances = np.hypot(px, py)
+        i = int(distances.argmax())
+        if distances[i] > tolerance_km:
+            split = first + 1 + i
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return np.flatnonzero(keep)
+
+
+class TrackBuffer:
+    """Posiciones de un vuelo en columnas array('d'): 32 bytes por punto.
+
+    Al llegar a `max_points` se simplifica lo acumulado con Douglas–Peucker,
+    duplicando la tolerancia hasta quedar en la mitad; así un vuelo largo
+    nunca supera `max_points` puntos.
+    """
+
+    def __init__(self, max_points=TRACK_MAX_POINTS, tolerance_km=TRACK_SIMPLIFY_KM):
+        self.max_points = max(4, max_points)
+        self.tolerance_km = tolerance_km
+        self.ts = array('d')
+        self.lat = array('d')
+        self.lon = array('d')
+        self.altitude = array('d')
+
+    def __len__(self):
+        return len(self.ts)
+
+    def append(self, ts, lat, lon, altitude):
+        if self.ts and ts <= self.ts[-1]:
+            return
+        if len(self.ts) >= self.max_points:
+            self._shrink()
+        self.ts.append(ts)
+        self.lat.append(lat)
+        self.lon.append(lon)
+        self.altitude.append(float('nan') if altitude is None else altitude)
+
+    def _shrink(self):
+        tolerance = self.tolerance_km
+        target = self.max_points // 2
+        while True:
+            keep = douglas_peucker(self.lat, self.lon, tolerance)
+            if len(keep) <= target:
+                break
+            tolerance *= 2
+        self._take(keep)
+
+    def _take(self, keep):
+        for name in TRACK_FIELDS:
+            column = np.frombuffer(getattr(self, name), dtype=np.float64)[keep]
+            setattr(self, name, array('d', column.tobytes()))
+
+    def simplified(self, tolerance_km=None):
+        """Copia simplificada del track, para guardar al aterrizar."""
+        keep = douglas_peucker(self.lat, self.lon,
+                               self.tolerance_km if tolerance_km is None else tolerance_km)
+        track = TrackBuffer(self.max_points, self.tolerance_km)
+        for name in TRACK_FIELDS:
+            setattr(track, name, getattr(self, name))
+        track._take(keep)
+        return track
+
+    def distance_km(self):
+        """Largo del recorrido sobre la esfera (haversine entre puntos consecutivos)."""
+        if len(self.ts) < 2:
+            return 0.0
+        lat = np.radians(np.frombuffer(self.lat, dtype=np.float64))
+        lon = np.radians(np.frombuffer(self.lon, dtype=np.float64))
+        a = (np.sin(np.diff(lat) / 2) ** 2
+             + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2)
+        return float(2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0))).sum())
+
+    def points(self):
+        return [
+            [ts, lat, lon, None if altitude != altitude else altitude]
+            for ts, lat, lon, altitude in zip(self.ts, self.lat, self.lon, self.altitude)
+        ]
+
+    def encode(self):
+        """Columnas cuantizadas y codificadas por diferencias en un blob int32.
+
+        Los timestamps son relativos al primer punto; la altitud faltante se
+        completa con la anterior.
+        """
+        n = len(self.ts)
+        encoded = array('i')
+        if not n:
+            return encoded.tobytes()
+
+        altitude = np.frombuffer(self.altitude, dtype=np.float64).copy()
+        missing = np.isnan(altitude)
+        if missing.all():
+            altitude[:] = 0
+        elif missing.any():
+            index = np.where(~missing, np.arange(n), 0)
+            np.maximum.accumulate(index, out=index)
+            altitude = altitude[index]
+            altitude[np.isnan(altitude)] = altitude[~np.isnan(altitude)][0]
+
+        ts = np.frombuffer(self.ts, dtype=np.float64) - self.ts[0]
+        columns = (ts, np.frombuffer(self.lat, dtype=np.float64),
+                   np.frombuffer(self.lon, dtype=np.float64), altitude)
+        for column, scale in zip(columns, _SCALES):
+            quantized = np.rint(column * scale).astype(np.int64)
+            encoded.extend(np.diff(quantized, prepend=0).astype(np.int32).tolist())
+        if sys.byteorder != "little":
+            encoded.byteswap()
+        return encoded.tobytes()
+
+    @classmethod
+    def decode(cls, blob, started_ts, max_points=TRACK_MAX_POINTS):
+        encoded = array('i')
+        encoded.frombytes(blob)
+        if sys.byteorder != "little":
+            encoded.byteswap()
+        n = len(encoded) // len(TRACK_FIELDS)
+        values = np.frombuffer(encoded, dtype=np.int32).astype(np.int64).reshape(len(TRACK_FIELDS), n)
+
+        track = cls(max(max_points, n))
+        for name, deltas, scale in zip(TRACK_FIELDS, values, _SCALES):
+            column = np.cumsum(deltas) / scale
+            if name == "ts":
+                column = column + started_ts
+            setattr(track, name, array('d', column.tobytes()))
+        return track
+
+
+class TrackRecorder:
+    """Un TrackBuffer por avión en vuelo, indexado por matrícula."""
+
+    def __init__(self, max_points=TRACK_MAX_POINTS, tolerance_km=TRACK_SIMPLIFY_KM):
+        self.max_points = max_points
+        self.tolerance_km = tolerance_km
+        self._lock = threading.Lock()
+        self._tracks = {}
+
+    def record(self, planes_info, ts):
+        with self._lock:
+            for plane in planes_info:
+                if plane.lat is None or plane.lon is None:
+                    continue
+                track = self._tracks.get(plane.registration)
+                if track is None:
+                    track = self._tracks[plane.registration] = TrackBuffer(self.max_points, self.tolerance_km)
+                track.append(ts, plane.lat, plane.lon, plane.altitude)
+
+    def live(self, registration):
+        """Puntos del vuelo en curso, o None si no está en vuelo."""
+        with self._lock:
+            track = self._tracks.get(registration)
+            return track.points() if track is not None else None
+
+    def finish(self, registration):
+        """Cierra el vuelo y devuelve su track simplificado (o None)."""
+        with self._lock:
+            track = self._tracks.pop(registration, None)
+        if track is None or not len(track):
+            return None
+        return track.simplified()
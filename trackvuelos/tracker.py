@@ -0,0 +1,327 @@
+"""Motor de seguimiento compartido por el servidor Flask y el monitor standalone.
+
+Guarda el estado de los aviones, el historial y las posiciones, y avisa por
+Telegram de despegues y aterrizajes. Importa numpy y sqlite3, así que el
+handler serverless no lo usa.
+"""
+import logging
+import os
+import time
+from datetime import datetime
+
+from . import airports, metrics, opensky
+from .adsb_one import check_adsb_one_many
+from .config import ARGENTINA_AIRPORTS, ARGENTINA_TZ, HISTORY_FILE, STATE_FILE
+from .event_log import EventLog
+from .flight_store import FlightStore
+from .fleet import FleetRegistry
+from .flight_phase import IN_FLIGHT, LANDING, LANDING_AIRPORT_KM, TAKEOFF, FlightPhases
+from .fusion import FusionEngine
+from .log import new_tick
+from .messages import landing_message, takeoff_message
+from .notify import coalesce, notify_telegram, telegram_queue
+from .plane_state import PlaneState
+from .scheduler import POLL_HOT_BARO_RATE, POLL_NEAR_AIRPORT_KM, POLL_TIERS, PollScheduler
+from .singleflight import SingleFlight
+from .track import TrackBuffer, TrackRecorder
+
+logger = logging.getLogger(__name__)
+
+# Con flotas más grandes, ADSB.one solo se consulta por los aviones que estaban
+# en vuelo (para no confundir un hueco de OpenSky con un aterrizaje)
+ADSB_ONE_FALLBACK_MAX = int(os.getenv("ADSB_ONE_FALLBACK_MAX", "50"))
+
+# Una sola verificación en curso a la vez, compartida por el monitor y /api/check
+poll_flight = SingleFlight()
+
+history_log = EventLog()
+flight_store = FlightStore()
+state = PlaneState(STATE_FILE)
+fleet_registry = FleetRegistry()
+track_recorder = TrackRecorder()
+# OpenSky y ADSB.one en paralelo, con el dato más fresco de cada una
+fusion_engine = FusionEngine()
+
+# Con AIRPORTS_CSV se carga el dataset completo de OurAirports en su lugar
+AIRPORT_TABLE = airports.load_airport_table(ARGENTINA_AIRPORTS)
+
+# Último dato de cada avión en vuelo, por matrícula; lo actualiza run_check
+airborne = {}
+# Fuentes que vieron a cada avión en vuelo la última vez que apareció
+seen_by = {}
+
+# Reloj de las verificaciones (epoch); el replay usa el de los frames
+clock = time.time
+
+# Funciones llamadas con la lista de aviones al terminar cada verificación
+listeners = []
+
+def load():
+    """Carga el estado guardado, migra el historial viejo si hace falta y
+    reenvía los mensajes de Telegram que quedaron pendientes."""
+    state.load()
+    phases.restore(state.active, clock())
+    imported = history_log.import_legacy(HISTORY_FILE)
+    if imported:
+        logger.info("Historial importado de %s: %d eventos", HISTORY_FILE, imported)
+    if flight_store.is_empty():
+        flight_store.add_events(history_log.iter_events())
+    telegram_queue.start()
+
+def find_nearest_airport(lat, lon):
+    return airports.find_nearest_airport(AIRPORT_TABLE, lat, lon)
+
+def find_destination_airport(lat, lon, heading):
+    return airports.find_destination_airport(AIRPORT_TABLE, lat, lon, heading)
+
+def save_flight_event(callsign, event_type, data=None):
+    event = {
+        "callsign": callsign,
+        "type": event_type,
+        "timestamp": datetime.now(ARGENTINA_TZ).isoformat(),
+        "data": data or {}
+    }
+
+    try:
+        with metrics.span("history_io"):
+            history_log.append(event)
+            flight_store.add_event(event)
+    except Exception as e:
+        logger.error("Error guardando historial: %s", e)
+
+def finish_track(registration):
+    """Cierra el track del vuelo, lo guarda y devuelve el resumen para el evento de aterrizaje."""
+    track = track_recorder.finish(registration)
+    if track is None:
+        return {}
+
+    try:
+        with metrics.span("history_io"):
+            flight_store.add_track(registration, track)
+    except Exception as e:
+        logger.error("Error guardando track: %s", e)
+
+    altitude = track.altitude[-1]
+    return {
+        "lat": track.lat[-1],
+        "lon": track.lon[-1],
+        "altitude": None if altitude != altitude else round(altitude),
+        "track_points": len(track),
+        "duration_min": round((track.ts[-1] - track.ts[0]) / 60),
+        "distance_km": round(track.distance_km(), 1),
+    }
+
+def get_track(registration):
+    """Track del vuelo en curso o, si no está en vuelo, el último guardado."""
+    points = track_recorder.live(registration)
+    if points is not None:
+        return {"registration": registration, "status": "en_vuelo", "points": points}
+
+    stored = flight_store.last_track(registration)
+    if stored is None:
+        return None
+    started_ts, ended_ts, blob = stored
+    return {
+        "registration": registration,
+        "status": "aterrizado",
+        "points": TrackBuffer.decode(blob, started_ts).points(),
+    }
+
+def check_opensky(fleet, icao24s=None):
+    return opensky.check_opensky(fleet, ARGENTINA_AIRPORTS, icao24s)
+
+def _witnessed(icao24, sources_seen, answered, routes):
+    """Si alguna fuente que respondió podía ver al avión (lo consultó y, si
+    se sabe, es de las que lo venían viendo)."""
+    for source in answered:
+        if icao24 is not None and icao24 not in routes[source]:
+            continue
+        if not sources_seen or source in sources_seen:
+            return True
+    return False
+
+def check_flights(icao24s=None, use_opensky=True):
+    return poll_flight.do(run_check, icao24s, use_opensky)
+
+def run_check(icao24s=None, use_opensky=True):
+    """Una verificación. Llamar vía check_flights() salvo que ya se esté
+    dentro de poll_flight.
+
+    Sin `icao24s` se consulta toda la flota; con `icao24s` solo esos aviones
+    (consulta dirigida del scheduler), y los demás que estaban en vuelo se
+    mantienen como estaban. Con `use_opensky=False` se consulta solo
+    ADSB.one (consultas dirigidas fuera del presupuesto de créditos).
+    Despegues y aterrizajes salen de la fase de cada avión (ver
+    flight_phase): uno que falta queda perdido, no aterrizado. Devuelve
+    todos los aviones en vuelo.
+    """
+    started = time.perf_counter()
+    new_tick()
+    fleet = fleet_registry.current()
+    active_planes = state.active
+    planes_info = []
+
+    if icao24s is None:
+        queried = fleet.hexes
+        # En un barrido, cualquier avión en vuelo que no aparezca falta
+        expected = set(active_planes)
+    else:
+        queried = frozenset(icao24 for icao24 in icao24s if icao24 in fleet)
+        expected = {fleet[icao24] for icao24 in queried} & active_planes
+
+    # Las dos fuentes a la vez: OpenSky con toda la consulta y ADSB.one por
+    # avión (con flotas grandes, solo por los que estaban en vuelo)
+    if len(queried) <= ADSB_ONE_FALLBACK_MAX:
+        adsb_one_icao24s = list(queried)
+    else:
+        adsb_one_icao24s = [icao24 for icao24 in queried if fleet[icao24] in active_planes]
+    # Sin ADSB.one para ese pedido, OpenSky va igual
+    use_opensky = use_opensky or not adsb_one_icao24s
+    sources = {}
+    # Aviones que consulta cada fuente
+    routes = {}
+    if use_opensky:
+        sources["opensky"] = (lambda: check_opensky(fleet, None if icao24s is None else queried), 1)
+        routes["opensky"] = queried
+    if adsb_one_icao24s:
+        sources["adsb_one"] = (lambda: check_adsb_one_many(adsb_one_icao24s), len(adsb_one_icao24s))
+        routes["adsb_one"] = frozenset(adsb_one_icao24s)
+    logger.debug("Verificación iniciada", extra={"queried": len(queried), "adsb_one": len(adsb_one_icao24s)})
+    with metrics.span("fusion"):
+        observations, answered = fusion_engine.fetch(sources)
+
+    now = clock()
+    currently_flying = set(active_planes)
+    takeoffs = []
+    landings = []
+    with metrics.span("flight_phase"):
+        for icao24, observation in observations.items():
+            registration = observation.registration = fleet[icao24]
+            event = phases.observe(registration, observation, now)
+            if event == TAKEOFF:
+                takeoffs.append(observation)
+            elif event == LANDING:
+                landings.append(registration)
+            expected.discard(registration)
+            seen_by[registration] = frozenset(source for source, seen in answered.items() if icao24 in seen)
+            phase = phases.phase(registration)
+            if phase in IN_FLIGHT:
+                currently_flying.add(registration)
+                planes_info.append(observation)
+            else:
+                currently_flying.discard(registration)
+            logger.debug("%s visto por %s (%s)", registration, observation.source, phase,
+                         extra={"registration": registration, "source": observation.source, "phase": phase})
+
+        if answered:
+            # Si no respondió ninguna fuente que lo consultó y que lo venía viendo
+            # (caídas, con el circuito abierto o abandonadas por el hedge), no falta:
+            # que OpenSky no vea a un avión que solo ve ADSB.one no es evidencia.
+            # Lo mismo si no se consultó a OpenSky
+            if not use_opensky or len(answered) < len(sources):
+                hex_by_registration = {fleet[icao24]: icao24 for icao24 in queried
+                                       if fleet[icao24] in expected}
+                expected = {registration for registration in expected if _witnessed(
+                    hex_by_registration.get(registration), seen_by.get(registration), answered, routes)}
+            for registration in expected:
+                if phases.missing(registration, now) == LANDING:
+                    landings.append(registration)
+        else:
+            # Sin ninguna fuente no hay forma de distinguir un aterrizaje de un corte
+            logger.warning("Ninguna fuente respondió; se mantiene el estado anterior",
+                           extra={"queried": len(queried)})
+    currently_flying.difference_update(landings)
+
+    try:
+        with metrics.span("positions_io"):
+            flight_store.add_positions(planes_info, now)
+    except Exception as e:
+        logger.error("Error guardando posiciones: %s", e)
+    with metrics.span("track_record"):
+        track_recorder.record(planes_info, now)
+
+    # Los avisos del tick salen juntos al final, en la menor cantidad de mensajes
+    outbox = []
+
+    for plane_data in takeoffs:
+        registration = plane_data.registration
+        with metrics.span("geo_enrichment"):
+            nearest = find_nearest_airport(plane_data.lat, plane_data.lon)
+            destination = find_destination_airport(plane_data.lat, plane_data.lon, plane_data.heading)
+
+        is_in_progress = state.is_notified(registration)
+        logger.info("%s %s", registration, "en curso" if is_in_progress else "despegó",
+                    extra={"registration": registration, "event": "in_progress" if is_in_progress else "takeoff",
+                           "source": plane_data.source})
+        with metrics.span("message_build"):
+            outbox.append(takeoff_message(plane_data, nearest, destination, is_in_progress))
+        state.mark_notified(registration)
+
+        save_flight_event(registration, "in_progress" if is_in_progress else "takeoff", {
+            "icao24": plane_data.icao24,
+            "altitude": plane_data.altitude,
+            "velocity": plane_data.velocity,
+            "lat": plane_data.lat,
+            "lon": plane_data.lon,
+            "source": plane_data.source,
+            "nearest_airport": nearest['name'] if nearest else None
+        })
+
+    # Los perdidos siguen en vuelo con su último dato
+    for registration in [registration for registration in airborne if registration not in currently_flying]:
+        del airborne[registration]
+    for registration in [registration for registration in seen_by if registration not in currently_flying]:
+        del seen_by[registration]
+    for plane_data in planes_info:
+        airborne[plane_data.registration] = plane_data
+
+    for plane in landings:
+        logger.info("%s aterrizó", plane, extra={"registration": plane, "event": "landing"})
+        airborne.pop(plane, None)
+        with metrics.span("message_build"):
+            outbox.append(landing_message(plane))
+        save_flight_event(plane, "landing", finish_track(plane))
+
+        state.clear_notified(plane)
+
+    state.set_active(currently_flying)
+    # Una sola escritura por tick, y solo si algo cambió
+    with metrics.span("state_io"):
+        state.save()
+    with metrics.span("message_build"):
+        messages = coalesce(outbox)
+    for msg in messages:
+        notify_telegram(msg)
+    elapsed = time.perf_counter() - started
+    metrics.span_seconds.observe(elapsed, "tick")
+    logger.info("Verificación completada. Aviones en vuelo: %d", len(currently_flying), extra={
+        "in_flight": len(currently_flying),
+        "queried": len(queried),
+        "notifications": len(messages),
+        "elapsed_ms": round(elapsed * 1000, 1),
+    })
+
+    planes_info = list(airborne.values())
+    for listener in listeners:
+        listener(planes_info)
+    return planes_info
+
+def is_hot(plane_data):
+    """Despegue/aproximación: cerca de un aeropuerto o con régimen vertical fuerte."""
+    if plane_data.baro_rate is not None and abs(plane_data.baro_rate) >= POLL_HOT_BARO_RATE:
+        return True
+    nearest = find_nearest_airport(plane_data.lat, plane_data.lon)
+    return nearest is not None and nearest['distance'] <= POLL_NEAR_AIRPORT_KM
+
+def near_airport(lat, lon):
+    nearest = find_nearest_airport(lat, lon)
+    return nearest is not None and nearest['distance'] <= LANDING_AIRPORT_KM
+
+# Fase de cada avión: despegues y aterrizajes con tolerancia a huecos de cobertura
+phases = FlightPhases(near_airport)
+
+metrics.Gauge("trackvuelos_airborne_planes", "Aviones de la flota en vuelo",
+              function=lambda: len(airborne))
+
+# Loop del monitor: barridos de la flota más consultas dirigidas por avión
+scheduler = PollScheduler(check_flights, is_hot, tiers=POLL_TIERS)
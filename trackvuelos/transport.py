@@ -0,0 +1,73 @@
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "4"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+HTTP_BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER", "0.5"))
+# Segundos para establecer la conexión; el timeout de cada fuente es el de lectura
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+
+USER_AGENT = "trackvuelosprivados/3.0"
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def _retry_policy():
+    # Solo se reintentan errores de conexión y 5xx; los 429 los maneja cada
+    # cliente porque reintentar a ciegas consume más cuota. Los timeouts de
+    # lectura no (read=0): la consulta ya pudo haberse cobrado. Una llamada
+    # con timeouts() tarda a lo sumo (HTTP_RETRIES + 1) * HTTP_CONNECT_TIMEOUT
+    # más el backoff y el timeout de lectura
+    return Retry(
+        total=HTTP_RETRIES,
+        connect=HTTP_RETRIES,
+        read=0,
+        status=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        backoff_jitter=HTTP_BACKOFF_JITTER,
+        status_forcelist=(500, 502, 503, 504),
+        raise_on_status=False,
+    )
+
+
+def get_session(url, pool_maxsize=None):
+    """Devuelve la sesión keep-alive del host de `url`, creándola la primera vez."""
+    host = urlsplit(url).netloc or url
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({
+                "Accept-Encoding": "gzip, deflate",
+                "User-Agent": USER_AGENT,
+            })
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=pool_maxsize or HTTP_POOL_MAXSIZE,
+                max_retries=_retry_policy(),
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[host] = session
+        return session
+
+
+def timeouts(read):
+    """(connect, read) para requests: conectar nunca espera más que HTTP_CONNECT_TIMEOUT."""
+    return min(HTTP_CONNECT_TIMEOUT, read), read
+
+
+def get(url, **kwargs):
+    return get_session(url).get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return get_session(url).post(url, **kwargs)
+